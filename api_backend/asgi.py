@@ -14,3 +14,10 @@ from django.core.asgi import get_asgi_application
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'api_backend.settings')
 
 application = get_asgi_application()
+
+# Prepara URLs y serializers antes de aceptar peticiones. Las conexiones a la
+# base de datos son por hilo y las vistas síncronas corren en otro, así que
+# aquí no se abren.
+if os.environ.get('CALENTAR_AL_INICIAR', '1') == '1':
+    from miapp.calentamiento import calentar
+    calentar(conexion=False)
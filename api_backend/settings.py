@@ -10,6 +10,9 @@ SECRET_KEY = 'django-insecure-8p5s_twv88r^nvm_j=1hv))p0nf9c&_*=anmcx*g_c%n&2e91q
 DEBUG = True
 ALLOWED_HOSTS = ['*']  # 🔓 En producción cámbialo a dominios específicos
 
+# 🚀 SOLO_API=1 arranca workers sin el admin (menos imports y arranque más rápido)
+SOLO_API = os.environ.get('SOLO_API') == '1'
+
 INSTALLED_APPS = [
     'django.contrib.admin',
     'django.contrib.auth',
@@ -26,8 +29,12 @@ INSTALLED_APPS = [
     'rest_framework_simplejwt',
 ]
 
+if SOLO_API:
+    INSTALLED_APPS.remove('django.contrib.admin')
+
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
+    'miapp.admision.ControlAdmisionMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
@@ -64,9 +71,28 @@ DATABASES = {
         'PASSWORD': '12345',
         'HOST': 'localhost',
         'PORT': '5432',
+        # Reutiliza la conexión entre peticiones en lugar de abrir una por petición
+        'CONN_MAX_AGE': int(os.environ.get('DB_CONN_MAX_AGE', 60)),
+        'CONN_HEALTH_CHECKS': True,
     }
 }
 
+# 🗃️ Caché compartida entre workers (resumen del carrito y cubetas de tokens).
+# Sin REDIS_URL se usa la caché local del proceso y el resumen no se cachea
+if os.environ.get('REDIS_URL'):
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': os.environ['REDIS_URL'],
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        }
+    }
+
 AUTH_PASSWORD_VALIDATORS = [
     {
         'NAME': 'django.contrib.auth.password_validation.UserAttributeSimilarityValidator',
@@ -102,4 +128,33 @@ REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': [
         'rest_framework_simplejwt.authentication.JWTAuthentication',
     ],
+    # Cubetas de tokens por usuario (miapp.admision.CubetaTokensThrottle): ráfaga/periodo
+    'DEFAULT_THROTTLE_RATES': {
+        'checkout': '10/min',
+        'carrito': '120/min',
+    },
 }
+
+# 🚦 Control de admisión: peticiones simultáneas por proceso para las escrituras
+# pesadas; pasada la espera máxima (segundos) se responde 503 con Retry-After
+ADMISION_GRUPOS = {
+    'checkout': {
+        'rutas': ['/api/checkout/'],
+        'metodos': ['POST'],
+        'max_en_vuelo': 4,
+        'espera_maxima': 0.5,
+        'reintentar': 2,
+    },
+    'carrito': {
+        'rutas': ['/api/carrito/'],
+        'metodos': ['POST', 'PUT', 'PATCH', 'DELETE'],
+        'max_en_vuelo': 8,
+        'espera_maxima': 0.5,
+        'reintentar': 1,
+    },
+}
+
+# 📡 Eventos en tiempo real (SSE en /api/eventos/, solo bajo ASGI)
+# 'memoria': reparto dentro del proceso. 'base_datos': los eventos pasan por una
+# tabla para compartirlos entre procesos o comprobarlos en pruebas.
+EVENTOS_BACKEND = os.environ.get('EVENTOS_BACKEND', 'memoria')
@@ -1,6 +1,6 @@
+from django.apps import apps
 from django.conf import settings 
 from django.conf.urls.static import static
-from django.contrib import admin
 from django.urls import path, include
 from rest_framework_simplejwt.views import (
     TokenObtainPairView,
@@ -9,7 +9,6 @@ from rest_framework_simplejwt.views import (
 from miapp.views import UsuarioActualView  # 👈 importar tu vista
 
 urlpatterns = [
-    path('admin/', admin.site.urls),
     path('api/', include('miapp.urls')),
 
     # 🔐 Rutas JWT
@@ -20,5 +19,11 @@ urlpatterns = [
     path('api/usuario-actual/', UsuarioActualView.as_view(), name='usuario_actual'),
 ]
 
+# 🛠️ El admin solo se carga en los workers que lo tienen instalado (ver SOLO_API)
+if apps.is_installed('django.contrib.admin'):
+    from django.contrib import admin
+
+    urlpatterns.insert(0, path('admin/', admin.site.urls))
+
 if settings.DEBUG:
     urlpatterns += static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT)
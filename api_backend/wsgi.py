@@ -14,3 +14,8 @@ from django.core.wsgi import get_wsgi_application
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'api_backend.settings')
 
 application = get_wsgi_application()
+
+# Prepara URLs, serializers y la base de datos antes de aceptar peticiones
+if os.environ.get('CALENTAR_AL_INICIAR', '1') == '1':
+    from miapp.calentamiento import calentar
+    calentar()
@@ -0,0 +1,11 @@
+# Configuración de gunicorn; se carga sola al arrancar desde este directorio:
+#   gunicorn api_backend.wsgi [--preload]
+import os
+
+
+def post_worker_init(worker):
+    # api_backend.wsgi ya calentó URLs y serializers (antes del fork si se usa
+    # --preload) y cerró su conexión; cada worker abre aquí la suya
+    if os.environ.get('CALENTAR_AL_INICIAR', '1') == '1':
+        from miapp.calentamiento import calentar_conexion
+        calentar_conexion()
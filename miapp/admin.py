@@ -1,6 +1,9 @@
+from django import forms
 from django.contrib import admin
 from django.utils.html import format_html
-from miapp.models import Categoria, Producto, Carrito, Pedido, DetallePedido, Favorito
+from miapp.models import (
+    Categoria, Producto, Carrito, Pedido, DetallePedido, Favorito, PedidoArchivado
+)
 
 
 @admin.register(Categoria)
@@ -83,9 +86,52 @@ class CarritoAdmin(BaseUserRestrictedAdmin):
     list_display = ('id', 'usuario', 'producto', 'cantidad')
 
 
+class PedidoAdminForm(forms.ModelForm):
+    class Meta:
+        model = Pedido
+        fields = '__all__'
+
+    def clean_estado(self):
+        # El formulario de edición respeta las mismas transiciones que las acciones
+        estado = self.cleaned_data['estado']
+        if self.instance.pk and not self.instance.puede_pasar_a(estado):
+            raise forms.ValidationError(
+                f"Un pedido {self.instance.estado} no puede pasar a {estado}."
+            )
+        return estado
+
+
 @admin.register(Pedido)
 class PedidoAdmin(BaseUserRestrictedAdmin):
-    list_display = ('id', 'usuario', 'total', 'estado')
+    form = PedidoAdminForm
+    list_display = ('id', 'usuario', 'total', 'estado', 'creado')
+    list_filter = ('estado',)
+    actions = ['marcar_en_camino', 'marcar_entregados']
+
+    def _transicionar(self, request, queryset, estado):
+        seleccionados = queryset.count()
+        actualizados = queryset.transicionar(estado)
+        omitidos = seleccionados - actualizados
+        self.message_user(request, f"{actualizados} pedidos pasaron a '{estado}'; {omitidos} no admitían el cambio.")
+
+    @admin.action(description="Marcar como en camino", permissions=['change'])
+    def marcar_en_camino(self, request, queryset):
+        self._transicionar(request, queryset, 'en camino')
+
+    @admin.action(description="Marcar como entregados", permissions=['change'])
+    def marcar_entregados(self, request, queryset):
+        self._transicionar(request, queryset, 'entregados')
+
+
+@admin.register(PedidoArchivado)
+class PedidoArchivadoAdmin(BaseUserRestrictedAdmin):
+    list_display = ('id', 'usuario', 'total', 'estado', 'creado', 'archivado')
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
 
 
 @admin.register(Favorito)
@@ -0,0 +1,141 @@
+import asyncio
+import threading
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.http import JsonResponse
+from rest_framework.permissions import SAFE_METHODS
+from rest_framework.throttling import ScopedRateThrottle
+
+
+# ✅ Límite de peticiones en vuelo por grupo de endpoints
+class GrupoAdmision:
+    def __init__(self, nombre, rutas, metodos, max_en_vuelo, espera_maxima, reintentar):
+        self.nombre = nombre
+        self.rutas = tuple(rutas)
+        self.metodos = {metodo.upper() for metodo in metodos}
+        self.max_en_vuelo = max_en_vuelo
+        self.espera_maxima = espera_maxima
+        self.reintentar = reintentar
+        self.semaforo = threading.BoundedSemaphore(max_en_vuelo)
+        self._semaforo_async = None
+
+    @property
+    def semaforo_async(self):
+        # Se crea en el event loop que lo usa por primera vez
+        if self._semaforo_async is None:
+            self._semaforo_async = asyncio.BoundedSemaphore(self.max_en_vuelo)
+        return self._semaforo_async
+
+    def aplica(self, request):
+        return self.aplica_a(request.method, request.path)
+
+    def aplica_a(self, metodo, ruta):
+        return metodo.upper() in self.metodos and ruta.startswith(self.rutas)
+
+    def rechazo(self):
+        respuesta = JsonResponse(
+            {'error': 'Servicio saturado, reintenta en unos segundos.'}, status=503
+        )
+        respuesta['Retry-After'] = str(self.reintentar)
+        return respuesta
+
+
+def grupos_configurados():
+    return [
+        GrupoAdmision(nombre, **config)
+        for nombre, config in getattr(settings, 'ADMISION_GRUPOS', {}).items()
+    ]
+
+
+def requiere_admision(metodo, ruta):
+    """Indica si la petición pasaría por algún grupo de ADMISION_GRUPOS."""
+    return any(grupo.aplica_a(metodo, ruta) for grupo in grupos_configurados())
+
+
+class ControlAdmisionMiddleware:
+    """
+    Limita las peticiones simultáneas de cada grupo de ADMISION_GRUPOS. Si no
+    hay plaza libre dentro de `espera_maxima` segundos responde 503 con
+    Retry-After, así las escrituras saturadas no acaparan los workers que
+    atienden las lecturas del catálogo. Los límites son por proceso.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.grupos = grupos_configurados()
+        self.es_async = iscoroutinefunction(get_response)
+        if self.es_async:
+            markcoroutinefunction(self)
+
+    def _grupo(self, request):
+        return next((grupo for grupo in self.grupos if grupo.aplica(request)), None)
+
+    def __call__(self, request):
+        if self.es_async:
+            return self.__acall__(request)
+        grupo = self._grupo(request)
+        if grupo is None:
+            return self.get_response(request)
+        if not grupo.semaforo.acquire(timeout=grupo.espera_maxima):
+            return grupo.rechazo()
+        try:
+            return self.get_response(request)
+        finally:
+            grupo.semaforo.release()
+
+    async def __acall__(self, request):
+        grupo = self._grupo(request)
+        if grupo is None:
+            return await self.get_response(request)
+        semaforo = grupo.semaforo_async
+        if semaforo.locked():
+            try:
+                await asyncio.wait_for(semaforo.acquire(), grupo.espera_maxima)
+            except asyncio.TimeoutError:
+                return grupo.rechazo()
+        else:
+            await semaforo.acquire()
+        try:
+            return await self.get_response(request)
+        finally:
+            semaforo.release()
+
+
+# ✅ Cubeta de tokens por usuario para las escrituras
+class CubetaTokensThrottle(ScopedRateThrottle):
+    """
+    Usa la tasa 'N/periodo' del `throttle_scope` de la vista como cubeta de
+    tokens: admite ráfagas de N escrituras y se recarga de forma continua.
+    Las lecturas no se limitan. El estado vive en la caché de Django, que
+    es compartida si CACHES usa un backend compartido.
+    """
+    cache_format = 'cubeta_%(scope)s_%(ident)s'
+
+    def allow_request(self, request, view):
+        self.espera = None
+        if request.method in SAFE_METHODS:
+            return True
+        self.scope = getattr(view, self.scope_attr, None)
+        if not self.scope:
+            return True
+        self.rate = self.get_rate()
+        self.num_requests, self.duration = self.parse_rate(self.rate)
+        if self.rate is None:
+            return True
+
+        self.key = self.get_cache_key(request, view)
+        self.now = self.timer()
+        recarga = self.num_requests / self.duration
+        tokens, ultimo = self.cache.get(self.key, (self.num_requests, self.now))
+        tokens = min(self.num_requests, tokens + (self.now - ultimo) * recarga)
+        if tokens < 1:
+            self.espera = (1 - tokens) / recarga
+            return False
+        self.cache.set(self.key, (tokens - 1, self.now), self.duration)
+        return True
+
+    def wait(self):
+        return self.espera
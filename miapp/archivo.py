@@ -0,0 +1,40 @@
+from datetime import timedelta
+
+from django.db import transaction
+from django.utils import timezone
+
+from .models import Pedido, DetallePedido, PedidoArchivado, DetallePedidoArchivado
+
+CAMPOS_PEDIDO = ['id', 'usuario_id', 'total', 'estado', 'creado', 'actualizado']
+CAMPOS_DETALLE = ['id', 'pedido_id', 'producto_id', 'cantidad', 'precio_unitario']
+
+
+# ✅ Traslado de pedidos entregados a las tablas de histórico
+def pedidos_archivables(dias):
+    limite = timezone.now() - timedelta(days=dias)
+    return Pedido.objects.filter(estado='entregados', actualizado__lt=limite)
+
+
+def archivar_lote(dias, tamano):
+    """Mueve un lote de pedidos archivables en una transacción. Devuelve cuántos movió."""
+    with transaction.atomic():
+        ids = list(
+            pedidos_archivables(dias)
+            .order_by('id')
+            .select_for_update(skip_locked=True)
+            .values_list('id', flat=True)[:tamano]
+        )
+        if not ids:
+            return 0
+
+        PedidoArchivado.objects.bulk_create(
+            PedidoArchivado(**pedido)
+            for pedido in Pedido.objects.filter(id__in=ids).values(*CAMPOS_PEDIDO)
+        )
+        detalles = DetallePedido.objects.filter(pedido_id__in=ids)
+        DetallePedidoArchivado.objects.bulk_create(
+            DetallePedidoArchivado(**detalle) for detalle in detalles.values(*CAMPOS_DETALLE)
+        )
+        detalles.delete()
+        Pedido.objects.filter(id__in=ids).delete()
+    return len(ids)
@@ -0,0 +1,77 @@
+import logging
+import time
+
+from django.db import connection
+from django.urls import get_resolver
+
+logger = logging.getLogger(__name__)
+
+
+# ✅ Calentamiento del worker antes de recibir tráfico
+def calentar(conexion=True):
+    """
+    Prepara lo que de otro modo pagaría la primera petición: compila las URLs,
+    construye los serializers y comprueba la base de datos con las consultas
+    del catálogo. Devuelve los segundos de cada paso.
+
+    La conexión se cierra al terminar: con gunicorn --preload este código
+    corre antes del fork y los workers no deben heredar el mismo socket.
+    Cada worker abre la suya con calentar_conexion() (ver gunicorn.conf.py).
+    """
+    pasos = [('urls', _urls), ('serializers', _serializers)]
+    if conexion:
+        pasos += [('conexion', connection.ensure_connection), ('catalogo', _catalogo)]
+    tiempos = _ejecutar(pasos)
+    if conexion:
+        connection.close()
+    return tiempos
+
+
+def calentar_conexion():
+    """
+    Abre la conexión del proceso actual y la deja abierta para la primera
+    petición (CONN_MAX_AGE). Se llama en cada worker después del fork.
+    """
+    return _ejecutar([('conexion', connection.ensure_connection), ('catalogo', _catalogo)])
+
+
+def _ejecutar(pasos):
+    tiempos = {}
+    for nombre, paso in pasos:
+        inicio = time.perf_counter()
+        try:
+            paso()
+        except Exception:
+            # Un fallo aquí no debe impedir que el worker arranque
+            logger.exception('Calentamiento: falló el paso %s', nombre)
+        tiempos[nombre] = time.perf_counter() - inicio
+    logger.info('Calentamiento completado: %s', {k: round(v, 4) for k, v in tiempos.items()})
+    return tiempos
+
+
+def _urls():
+    resolver = get_resolver()
+    resolver.resolve('/api/productos/')
+    # Fuerza la compilación de todas las rutas con nombre para reverse()
+    resolver.reverse_dict
+
+
+def _serializers():
+    from . import serializers
+
+    for serializer_class in (
+        serializers.UserSerializer, serializers.CategoriaSerializer,
+        serializers.ProductoSerializer, serializers.CarritoSerializer,
+        serializers.DetallePedidoProductoSerializer, serializers.PedidoSerializer,
+        serializers.FavoritoSerializer, serializers.PedidoArchivadoSerializer,
+    ):
+        serializer_class().fields
+
+
+def _catalogo():
+    from .catalogo import MODELOS
+    from .models import CambioCatalogo
+
+    for modelo in MODELOS.values():
+        list(modelo.objects.order_by('id').values_list('id', flat=True)[:1])
+    CambioCatalogo.objects.order_by('-id').values_list('id', flat=True).first()
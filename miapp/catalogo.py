@@ -0,0 +1,78 @@
+import hashlib
+from datetime import timedelta
+
+from django.db.models import Max, Min
+from django.utils import timezone
+from django.utils.http import quote_etag
+
+from .models import Categoria, Producto, CambioCatalogo
+
+MODELOS = {'categoria': Categoria, 'producto': Producto}
+# Tiempo máximo que un registro puede tardar en confirmarse tras crearse;
+# los ids se asignan al insertar pero se ven al confirmar, no en orden
+VENTANA_CONFIRMACION = timedelta(seconds=10)
+
+
+# ✅ Versión del catálogo para ETag / Last-Modified
+def version_catalogo(modelos, request):
+    """ETag y fecha de la última modificación de los modelos indicados."""
+    # Último registro de cada modelo, leído al final de cambio_modelo_id_idx
+    ultimos = [
+        CambioCatalogo.objects.filter(modelo=modelo).order_by('-id').values('id', 'fecha').first()
+        for modelo in modelos
+    ]
+    ultimo = max(filter(None, ultimos), key=lambda registro: registro['id'], default=None)
+    # La respuesta depende del usuario (excluye sus productos) y de la query string
+    clave = '|'.join([
+        ','.join(modelos),
+        str(ultimo['id'] if ultimo else 0),
+        str(request.user.pk or 0),
+        request.META.get('QUERY_STRING', ''),
+    ])
+    etag = quote_etag(hashlib.md5(clave.encode()).hexdigest())
+    return etag, ultimo['fecha'] if ultimo else None
+
+
+# ✅ Cambios desde un cursor
+def cambios_desde(cursor, limite):
+    """
+    Devuelve el último cambio de cada objeto con id de registro mayor que el
+    cursor, el nuevo cursor y si quedan más cambios por leer.
+
+    El cursor no avanza más allá del registro reciente más antiguo: una
+    transacción aún abierta puede tener un id menor que otro ya visible.
+    """
+    registros = CambioCatalogo.objects.filter(id__gt=cursor)
+    corte = CambioCatalogo.objects.filter(
+        fecha__gt=timezone.now() - VENTANA_CONFIRMACION
+    ).aggregate(corte=Min('id'))['corte']
+    if corte is not None:
+        registros = registros.filter(id__lt=corte)
+    registros = list(
+        registros.order_by('id')
+        .values_list('id', 'modelo', 'objeto_id', 'eliminado')[:limite + 1]
+    )
+    mas = len(registros) > limite
+    registros = registros[:limite]
+
+    ultimos = {}
+    for _, modelo, objeto_id, eliminado in registros:
+        ultimos[(modelo, objeto_id)] = eliminado
+
+    modificados = {modelo: [] for modelo in MODELOS}
+    eliminados = {modelo: [] for modelo in MODELOS}
+    for (modelo, objeto_id), eliminado in ultimos.items():
+        (eliminados if eliminado else modificados)[modelo].append(objeto_id)
+
+    nuevo_cursor = registros[-1][0] if registros else cursor
+    return modificados, eliminados, nuevo_cursor, mas
+
+
+def compactar_cambios():
+    """Borra los registros superados por otro posterior del mismo objeto."""
+    ultimos = (
+        CambioCatalogo.objects.values('modelo', 'objeto_id')
+        .annotate(ultimo=Max('id'))
+        .values('ultimo')
+    )
+    return CambioCatalogo.objects.exclude(id__in=ultimos).delete()[0]
@@ -0,0 +1,192 @@
+import asyncio
+import logging
+import threading
+import time
+from datetime import timedelta
+from itertools import islice
+
+from django.conf import settings
+from django.db import close_old_connections, transaction
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+# Eventos pendientes por suscriptor; si un cliente lento se llena se descartan los más viejos
+TAMANO_COLA = 100
+# Eventos que se publican de una vez en las notificaciones masivas
+TAMANO_LOTE = 500
+
+
+def canal_producto(producto_id):
+    return f'producto:{producto_id}'
+
+
+def canal_pedidos(usuario_id):
+    return f'pedidos:{usuario_id}'
+
+
+# ✅ Reparto de eventos dentro del proceso
+class Difusor:
+    """
+    Reparte cada evento publicado a las colas asyncio suscritas al canal.
+    Publicar es seguro desde cualquier hilo: la entrega se agenda en el
+    event loop de cada suscriptor.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._suscriptores = {}
+
+    def suscribir(self, canales):
+        entrada = (asyncio.get_running_loop(), asyncio.Queue(maxsize=TAMANO_COLA))
+        with self._lock:
+            for canal in canales:
+                self._suscriptores.setdefault(canal, set()).add(entrada)
+        return entrada
+
+    def cancelar(self, canales, entrada):
+        with self._lock:
+            for canal in canales:
+                suscriptores = self._suscriptores.get(canal)
+                if suscriptores is None:
+                    continue
+                suscriptores.discard(entrada)
+                if not suscriptores:
+                    del self._suscriptores[canal]
+
+    def publicar(self, canal, evento):
+        with self._lock:
+            destinos = list(self._suscriptores.get(canal, ()))
+        for loop, cola in destinos:
+            try:
+                loop.call_soon_threadsafe(_encolar, cola, evento)
+            except RuntimeError:
+                # El loop del suscriptor ya se cerró
+                pass
+
+    def hay_suscriptores(self, canal):
+        return canal in self._suscriptores
+
+    def hay_suscriptores_con_prefijo(self, prefijo):
+        with self._lock:
+            return any(canal.startswith(prefijo) for canal in self._suscriptores)
+
+
+def _encolar(cola, evento):
+    if cola.full():
+        cola.get_nowait()
+    cola.put_nowait(evento)
+
+
+difusor = Difusor()
+
+
+# ✅ Backends de publicación
+class BackendMemoria:
+    """Entrega directa a los suscriptores del mismo proceso."""
+
+    def publicar(self, canal, evento):
+        if difusor.hay_suscriptores(canal):
+            transaction.on_commit(lambda: difusor.publicar(canal, evento))
+
+    def publicar_varios(self, mensajes):
+        for canal, evento in mensajes:
+            self.publicar(canal, evento)
+
+    def hay_interesados(self, prefijo):
+        return difusor.hay_suscriptores_con_prefijo(prefijo)
+
+    def iniciar(self):
+        pass
+
+
+class BackendBaseDatos:
+    """
+    Guarda los eventos en EventoTiempoReal y un hilo por proceso los lee y
+    reparte. Sirve para compartir eventos entre procesos sin LISTEN/NOTIFY
+    y para comprobarlos en pruebas.
+    """
+
+    intervalo = 1.0
+    retencion = timedelta(minutes=10)
+
+    def __init__(self):
+        self._hilo = None
+        self._lock = threading.Lock()
+
+    def publicar(self, canal, evento):
+        from .models import EventoTiempoReal
+        # Se inserta en la transacción actual: si se revierte, el evento desaparece
+        EventoTiempoReal.objects.create(canal=canal, tipo=evento['tipo'], datos=evento['datos'])
+
+    def publicar_varios(self, mensajes):
+        from .models import EventoTiempoReal
+        EventoTiempoReal.objects.bulk_create([
+            EventoTiempoReal(canal=canal, tipo=evento['tipo'], datos=evento['datos'])
+            for canal, evento in mensajes
+        ])
+
+    def hay_interesados(self, prefijo):
+        # Los suscriptores pueden estar en otro proceso
+        return True
+
+    def iniciar(self):
+        with self._lock:
+            if self._hilo is None:
+                self._hilo = threading.Thread(target=self._leer, name='eventos-bd', daemon=True)
+                self._hilo.start()
+
+    def _leer(self):
+        from .models import EventoTiempoReal
+        ultimo = EventoTiempoReal.objects.order_by('-id').values_list('id', flat=True).first() or 0
+        vueltas = 0
+        while True:
+            time.sleep(self.intervalo)
+            close_old_connections()
+            try:
+                nuevos = EventoTiempoReal.objects.filter(id__gt=ultimo).order_by('id').values_list(
+                    'id', 'canal', 'tipo', 'datos'
+                )
+                for ultimo, canal, tipo, datos in nuevos:
+                    difusor.publicar(canal, {'tipo': tipo, 'datos': datos})
+                vueltas += 1
+                if vueltas % 60 == 0:
+                    EventoTiempoReal.objects.filter(fecha__lt=timezone.now() - self.retencion).delete()
+            except Exception:
+                logger.exception('Error leyendo eventos de la base de datos')
+
+
+BACKENDS = {'memoria': BackendMemoria, 'base_datos': BackendBaseDatos}
+_backend = None
+
+
+def backend():
+    global _backend
+    if _backend is None:
+        _backend = BACKENDS[getattr(settings, 'EVENTOS_BACKEND', 'memoria')]()
+    return _backend
+
+
+# ✅ Eventos de la tienda
+def publicar(canal, tipo, datos):
+    backend().publicar(canal, {'tipo': tipo, 'datos': datos})
+
+
+def notificar_stock(productos):
+    """Recibe pares (id, stock)."""
+    for producto_id, stock in productos:
+        publicar(canal_producto(producto_id), 'stock', {'id': producto_id, 'stock': stock})
+
+
+def hay_interesados_pedidos():
+    return backend().hay_interesados(canal_pedidos(''))
+
+
+def notificar_estado(pedidos):
+    """Recibe tuplas (id, usuario_id, estado); se publican por lotes."""
+    mensajes = (
+        (canal_pedidos(usuario_id), {'tipo': 'pedido', 'datos': {'id': pedido_id, 'estado': estado}})
+        for pedido_id, usuario_id, estado in pedidos
+    )
+    while lote := list(islice(mensajes, TAMANO_LOTE)):
+        backend().publicar_varios(lote)
@@ -0,0 +1,77 @@
+import copy
+import json
+
+from django.http import QueryDict
+from django.urls import Resolver404, resolve
+
+from .admision import requiere_admision
+
+# Vistas que no se pueden ejecutar dentro de un lote. Tampoco se admiten las
+# subpeticiones de ADMISION_GRUPOS: el control de admisión solo ve la externa
+RUTAS_EXCLUIDAS = {'batch', 'eventos'}
+# Cabeceras de la petición externa que no deben heredar las subpeticiones
+CABECERAS_EXCLUIDAS = (
+    'CONTENT_TYPE', 'CONTENT_LENGTH', 'HTTP_AUTHORIZATION',
+    'HTTP_IF_NONE_MATCH', 'HTTP_IF_MODIFIED_SINCE', 'HTTP_IF_MATCH', 'HTTP_IF_UNMODIFIED_SINCE',
+)
+
+
+# ✅ Ejecución de subpeticiones con la autenticación de la petición del lote
+def ejecutar(request, metodo, ruta, cuerpo=None):
+    """Ejecuta una subpetición y devuelve (status, cuerpo decodificado)."""
+    path, _, query = ruta.partition('?')
+    try:
+        coincidencia = resolve(path)
+    except Resolver404:
+        return 404, {'detail': 'Ruta no encontrada.'}
+    if (
+        not path.startswith('/api/')
+        or coincidencia.url_name in RUTAS_EXCLUIDAS
+        or requiere_admision(metodo, path)
+    ):
+        return 400, {'detail': 'Ruta no permitida en un lote.'}
+
+    subpeticion = _construir(request, metodo, path, query, cuerpo)
+    subpeticion.resolver_match = coincidencia
+    respuesta = coincidencia.func(subpeticion, *coincidencia.args, **coincidencia.kwargs)
+    if getattr(respuesta, 'streaming', False):
+        return 400, {'detail': 'Las respuestas en streaming no se pueden agrupar.'}
+    if hasattr(respuesta, 'render'):
+        respuesta.render()
+
+    contenido = respuesta.content
+    if contenido and respuesta.get('Content-Type', '').startswith('application/json'):
+        contenido = json.loads(contenido)
+    else:
+        contenido = contenido.decode(respuesta.charset or 'utf-8') or None
+    return respuesta.status_code, contenido
+
+
+def _construir(request, metodo, path, query, cuerpo):
+    original = request._request
+    subpeticion = copy.copy(original)
+    for atributo in ('_post', '_files', '_stream'):
+        subpeticion.__dict__.pop(atributo, None)
+
+    datos = json.dumps(cuerpo).encode() if cuerpo is not None else b''
+    subpeticion.META = {
+        clave: valor for clave, valor in original.META.items() if clave not in CABECERAS_EXCLUIDAS
+    }
+    subpeticion.META.update({
+        'REQUEST_METHOD': metodo,
+        'PATH_INFO': path,
+        'QUERY_STRING': query,
+        'CONTENT_TYPE': 'application/json',
+        'CONTENT_LENGTH': str(len(datos)),
+    })
+    subpeticion.method = metodo
+    subpeticion.path = subpeticion.path_info = path
+    subpeticion.GET = QueryDict(query)
+    subpeticion._body = datos
+    subpeticion._read_started = True
+
+    # DRF usa este usuario en lugar de volver a validar el JWT
+    if request.user.is_authenticated:
+        subpeticion._force_auth_user = request.user
+        subpeticion._force_auth_token = request.auth
+    return subpeticion
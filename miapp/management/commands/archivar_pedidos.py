@@ -0,0 +1,23 @@
+from django.core.management.base import BaseCommand
+
+from miapp.archivo import archivar_lote
+
+
+class Command(BaseCommand):
+    help = "Mueve los pedidos entregados hace más de N días a las tablas de histórico, por lotes."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--dias', type=int, default=90, help="Antigüedad mínima desde la entrega.")
+        parser.add_argument('--lote', type=int, default=1000, help="Pedidos movidos por transacción.")
+        parser.add_argument('--max-lotes', type=int, default=None, help="Detenerse tras este número de lotes.")
+
+    def handle(self, *args, **options):
+        total = lotes = 0
+        while options['max_lotes'] is None or lotes < options['max_lotes']:
+            movidos = archivar_lote(options['dias'], options['lote'])
+            if not movidos:
+                break
+            total += movidos
+            lotes += 1
+            self.stdout.write(f"Lote {lotes}: {movidos} pedidos archivados")
+        self.stdout.write(self.style.SUCCESS(f"Pedidos archivados: {total}"))
@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from miapp.catalogo import compactar_cambios
+
+
+class Command(BaseCommand):
+    help = "Elimina del registro de cambios del catálogo las entradas superadas por otra más reciente."
+
+    def handle(self, *args, **options):
+        borrados = compactar_cambios()
+        self.stdout.write(self.style.SUCCESS(f"Registros eliminados: {borrados}"))
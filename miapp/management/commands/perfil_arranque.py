@@ -0,0 +1,93 @@
+import json
+import os
+import re
+import subprocess
+import sys
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+# Se ejecuta en un proceso nuevo para medir un arranque en frío real
+SCRIPT_ARRANQUE = """
+import io, json, os, sys, time
+from wsgiref.util import setup_testing_defaults
+
+inicio = time.perf_counter()
+from api_backend.wsgi import application
+if os.environ['CALENTAR_AL_INICIAR'] == '1':
+    # Lo que hace post_worker_init de gunicorn.conf.py en cada worker
+    from miapp.calentamiento import calentar_conexion
+    calentar_conexion()
+arranque = time.perf_counter() - inicio
+
+def peticion(ruta):
+    entorno = {'PATH_INFO': ruta, 'REQUEST_METHOD': 'GET', 'wsgi.input': io.BytesIO()}
+    setup_testing_defaults(entorno)
+    estado = []
+    inicio = time.perf_counter()
+    b''.join(application(entorno, lambda s, h, e=None: estado.append(s)))
+    return time.perf_counter() - inicio, estado[0]
+
+primera, estado = peticion(sys.argv[1])
+segunda, _ = peticion(sys.argv[1])
+print(json.dumps({'arranque': arranque, 'primera': primera, 'segunda': segunda, 'estado': estado}))
+"""
+
+LINEA_IMPORTTIME = re.compile(r'import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s*)(\S+)')
+
+
+class Command(BaseCommand):
+    help = (
+        "Informe de arranque del worker: tiempo de importación por módulo y tiempo "
+        "hasta la primera respuesta con y sin calentamiento."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--top', type=int, default=25, help="Módulos a listar.")
+        parser.add_argument('--ruta', default='/api/categorias/', help="Ruta de la primera petición.")
+
+    def handle(self, *args, **options):
+        self._importaciones(options['top'])
+        self._primera_peticion(options['ruta'])
+
+    def _entorno(self, **extra):
+        entorno = dict(os.environ, DJANGO_SETTINGS_MODULE=settings.SETTINGS_MODULE, **extra)
+        entorno['PYTHONPATH'] = os.pathsep.join(filter(None, [str(settings.BASE_DIR), entorno.get('PYTHONPATH')]))
+        return entorno
+
+    def _importaciones(self, top):
+        proceso = subprocess.run(
+            [sys.executable, '-X', 'importtime', '-c', 'import api_backend.wsgi'],
+            env=self._entorno(CALENTAR_AL_INICIAR='0'), capture_output=True, text=True,
+        )
+        modulos = []
+        for linea in proceso.stderr.splitlines():
+            coincidencia = LINEA_IMPORTTIME.match(linea)
+            if coincidencia:
+                propio, acumulado, sangria, modulo = coincidencia.groups()
+                modulos.append((int(acumulado), int(propio), len(sangria) // 2, modulo))
+
+        # Solo los módulos importados directamente desde el nivel superior
+        raiz = [m for m in modulos if m[2] == 0]
+        total = sum(acumulado for acumulado, _, _, _ in raiz)
+        self.stdout.write(self.style.MIGRATE_HEADING(f"Importación de api_backend.wsgi: {total / 1000:.1f} ms"))
+        self.stdout.write(f"{'acumulado':>12} {'propio':>10}  módulo")
+        for acumulado, propio, _, modulo in sorted(modulos, reverse=True)[:top]:
+            self.stdout.write(f"{acumulado / 1000:10.1f}ms {propio / 1000:8.1f}ms  {modulo}")
+
+    def _primera_peticion(self, ruta):
+        self.stdout.write(self.style.MIGRATE_HEADING(f"Primera petición a {ruta}"))
+        for etiqueta, calentar in (('sin calentamiento', '0'), ('con calentamiento', '1')):
+            proceso = subprocess.run(
+                [sys.executable, '-c', SCRIPT_ARRANQUE, ruta],
+                env=self._entorno(CALENTAR_AL_INICIAR=calentar), capture_output=True, text=True,
+            )
+            if proceso.returncode != 0:
+                self.stderr.write(f"{etiqueta}: falló\n{proceso.stderr[-2000:]}")
+                continue
+            datos = json.loads(proceso.stdout.strip().splitlines()[-1])
+            self.stdout.write(
+                f"{etiqueta:18} arranque={datos['arranque'] * 1000:7.1f}ms  "
+                f"primera={datos['primera'] * 1000:7.1f}ms  segunda={datos['segunda'] * 1000:7.1f}ms  "
+                f"({datos['estado']})"
+            )
@@ -0,0 +1,83 @@
+import json
+import statistics
+import threading
+import time
+import urllib.error
+import urllib.request
+from collections import Counter, defaultdict
+
+from django.core.management.base import BaseCommand
+
+
+class Command(BaseCommand):
+    help = (
+        "Prueba de carga local: satura el checkout con escrituras concurrentes mientras "
+        "otros hilos leen el catálogo, y muestra códigos de estado y latencias por endpoint."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--url', default='http://127.0.0.1:8000', help="URL base del servidor.")
+        parser.add_argument('--token', required=True, help="JWT de acceso para las escrituras.")
+        parser.add_argument('--escritores', type=int, default=50, help="Hilos que hacen checkout.")
+        parser.add_argument('--lectores', type=int, default=5, help="Hilos que leen /api/productos/.")
+        parser.add_argument('--duracion', type=float, default=10.0, help="Segundos de prueba.")
+        parser.add_argument('--producto', type=int, help="Producto que se añade al carrito antes de cada checkout.")
+
+    def handle(self, *args, **options):
+        self.base = options['url'].rstrip('/')
+        self.token = options['token']
+        self.resultados = defaultdict(list)
+        self.lock = threading.Lock()
+        fin = time.monotonic() + options['duracion']
+
+        hilos = [
+            threading.Thread(target=self._escribir, args=(fin, options['producto']))
+            for _ in range(options['escritores'])
+        ] + [
+            threading.Thread(target=self._leer, args=(fin,))
+            for _ in range(options['lectores'])
+        ]
+        for hilo in hilos:
+            hilo.start()
+        for hilo in hilos:
+            hilo.join()
+        self._informe()
+
+    def _escribir(self, fin, producto):
+        while time.monotonic() < fin:
+            if producto:
+                self._peticion('carrito', 'POST', '/api/carrito/', {'producto': producto, 'cantidad': 1})
+            self._peticion('checkout', 'POST', '/api/checkout/', {})
+
+    def _leer(self, fin):
+        while time.monotonic() < fin:
+            self._peticion('catalogo', 'GET', '/api/productos/?fields=id,stock')
+
+    def _peticion(self, nombre, metodo, ruta, cuerpo=None):
+        datos = json.dumps(cuerpo).encode() if cuerpo is not None else None
+        peticion = urllib.request.Request(self.base + ruta, data=datos, method=metodo)
+        peticion.add_header('Content-Type', 'application/json')
+        if metodo != 'GET':
+            peticion.add_header('Authorization', f'Bearer {self.token}')
+        inicio = time.monotonic()
+        try:
+            with urllib.request.urlopen(peticion, timeout=30) as respuesta:
+                respuesta.read()
+                codigo = respuesta.status
+        except urllib.error.HTTPError as error:
+            codigo = error.code
+        except OSError:
+            codigo = 'error'
+        with self.lock:
+            self.resultados[nombre].append((codigo, time.monotonic() - inicio))
+
+    def _informe(self):
+        for nombre, resultados in sorted(self.resultados.items()):
+            latencias = sorted(latencia * 1000 for _, latencia in resultados)
+            codigos = Counter(codigo for codigo, _ in resultados)
+            percentil = lambda p: latencias[min(len(latencias) - 1, int(len(latencias) * p))]
+            self.stdout.write(
+                f"{nombre:10} peticiones={len(resultados):6}  "
+                f"p50={statistics.median(latencias):7.1f}ms  p95={percentil(0.95):7.1f}ms  "
+                f"p99={percentil(0.99):7.1f}ms  códigos={dict(codigos)}"
+            )
@@ -0,0 +1,309 @@
+import csv
+import io
+import json
+from functools import reduce
+from itertools import chain
+from operator import or_
+
+from django.db import transaction
+from django.utils import timezone
+from django.db.models import Case, CharField, F, IntegerField, DecimalField, Q, Value, When
+from rest_framework.exceptions import ValidationError
+
+from . import eventos, precios
+from .models import Categoria, Producto, DetallePedido, DetallePedidoArchivado, CambioCatalogo
+from .serializers import STOCK_MAXIMO, FilaImportacionProductoSerializer
+
+# Filas validadas y escritas por transacción
+TAMANO_LOTE = 500
+# Máximo de errores devueltos; el resto solo se cuenta
+MAX_ERRORES = 1000
+
+CAMPOS_PRODUCTO = ['id', 'nombre', 'precio', 'categoria', 'stock', 'imagen']
+CAMPOS_VENTAS = [
+    'pedido', 'estado', 'comprador', 'producto', 'nombre',
+    'cantidad', 'precio_unitario',
+]
+
+
+# ✅ Lectura en streaming de CSV / NDJSON
+def detectar_formato(archivo, formato=None):
+    if formato:
+        return formato.lower()
+    nombre = (getattr(archivo, 'name', '') or '').lower()
+    return 'ndjson' if nombre.endswith(('.ndjson', '.jsonl')) else 'csv'
+
+
+def leer_filas(archivo, formato):
+    """Genera (número de fila, dict) leyendo el archivo línea a línea."""
+    texto = io.TextIOWrapper(archivo, encoding='utf-8-sig', newline='')
+    if formato == 'csv':
+        for numero, fila in enumerate(csv.DictReader(texto), start=1):
+            yield numero, {k: v for k, v in fila.items() if k and v not in ('', None)}
+    elif formato == 'ndjson':
+        for numero, linea in enumerate(texto, start=1):
+            if not linea.strip():
+                continue
+            try:
+                fila = json.loads(linea)
+            except ValueError:
+                fila = None
+            if not isinstance(fila, dict):
+                yield numero, None
+                continue
+            yield numero, {k: v for k, v in fila.items() if v not in ('', None)}
+    else:
+        raise ValueError(f'Formato no soportado: {formato}')
+
+
+def _en_lotes(iterable, tamano):
+    lote = []
+    for elemento in iterable:
+        lote.append(elemento)
+        if len(lote) >= tamano:
+            yield lote
+            lote = []
+    if lote:
+        yield lote
+
+
+# ✅ Importación de productos por lotes (upsert limitado al vendedor)
+class ResultadoImportacion:
+    def __init__(self):
+        self.creados = 0
+        self.actualizados = 0
+        self.errores = []
+        self.errores_omitidos = 0
+        # Última fila ya escrita y error que detuvo la lectura, si lo hubo
+        self.filas_procesadas = 0
+        self.error = None
+
+    def agregar_error(self, fila, errores):
+        if len(self.errores) < MAX_ERRORES:
+            self.errores.append({'fila': fila, 'errores': errores})
+        else:
+            self.errores_omitidos += 1
+
+    def como_dict(self):
+        return {
+            'creados': self.creados,
+            'actualizados': self.actualizados,
+            'errores': self.errores,
+            'errores_omitidos': self.errores_omitidos,
+            'filas_procesadas': self.filas_procesadas,
+            'error': self.error,
+        }
+
+
+def importar_productos(archivo, vendedor, formato=None):
+    formato = detectar_formato(archivo, formato)
+    resultado = ResultadoImportacion()
+    try:
+        for lote in _en_lotes(leer_filas(archivo, formato), TAMANO_LOTE):
+            _importar_lote(lote, vendedor, resultado)
+            resultado.filas_procesadas = lote[-1][0]
+    except (ValueError, csv.Error) as error:
+        # Los lotes anteriores ya están guardados; el lote en curso se descarta
+        resultado.error = f'Lectura interrumpida tras la fila {resultado.filas_procesadas}: {error}'
+    return resultado
+
+
+def _importar_lote(lote, vendedor, resultado):
+    validas = []
+    for numero, fila in lote:
+        if fila is None:
+            resultado.agregar_error(numero, {'fila': ['JSON inválido.']})
+            continue
+        serializer = FilaImportacionProductoSerializer(data=fila)
+        if serializer.is_valid():
+            validas.append((numero, serializer.validated_data))
+        else:
+            resultado.agregar_error(numero, serializer.errors)
+
+    categorias = {datos['categoria'] for _, datos in validas if 'categoria' in datos}
+    ids = {datos['id'] for _, datos in validas if 'id' in datos}
+    with transaction.atomic():
+        categorias_existentes = set(
+            Categoria.objects.filter(id__in=categorias).values_list('id', flat=True)
+        )
+        # Bloquea las filas para que un checkout concurrente no cambie el stock a medias
+        existentes = set(
+            Producto.objects.select_for_update()
+            .filter(vendedor=vendedor, id__in=ids)
+            .order_by('id')
+            .values_list('id', flat=True)
+        )
+
+        nuevos, modificados = [], {}
+        for numero, datos in validas:
+            if 'categoria' in datos and datos['categoria'] not in categorias_existentes:
+                resultado.agregar_error(numero, {'categoria': [f'La categoría {datos["categoria"]} no existe.']})
+                continue
+
+            valores = {
+                ('categoria_id' if campo == 'categoria' else campo): valor
+                for campo, valor in datos.items() if campo != 'id'
+            }
+            if 'id' not in datos:
+                nuevos.append(Producto(vendedor=vendedor, **valores))
+            elif datos['id'] in existentes:
+                modificados.setdefault(datos['id'], {}).update(valores)
+            else:
+                resultado.agregar_error(numero, {'id': [f'El producto {datos["id"]} no existe o no te pertenece.']})
+
+        if nuevos:
+            Producto.objects.bulk_create(nuevos)
+        valores = _valores_importacion(modificados)
+        if valores:
+            # Cada columna solo cambia en las filas que la traen
+            Producto.objects.filter(id__in=modificados).update(actualizado=timezone.now(), **valores)
+        CambioCatalogo.registrar('producto', [p.id for p in nuevos] + list(modificados))
+        con_stock = [i for i, valores in modificados.items() if 'stock' in valores]
+        if con_stock:
+            eventos.notificar_stock(Producto.objects.filter(id__in=con_stock).values_list('id', 'stock'))
+        if modificados:
+            transaction.on_commit(lambda: precios.invalidar_por_productos(list(modificados)))
+    resultado.creados += len(nuevos)
+    resultado.actualizados += len(modificados)
+
+
+# Columna -> tipo de la expresión con la que se actualiza en la importación
+CAMPOS_IMPORTACION = {
+    'nombre': CharField(),
+    'precio': DecimalField(max_digits=10, decimal_places=2),
+    'categoria_id': IntegerField(),
+    'stock': IntegerField(),
+    'imagen': CharField(),
+}
+
+
+def _valores_importacion(modificados):
+    valores = {}
+    for campo, output_field in CAMPOS_IMPORTACION.items():
+        casos = [
+            When(id=producto_id, then=Value(cambios[campo]))
+            for producto_id, cambios in modificados.items() if campo in cambios
+        ]
+        if casos:
+            valores[campo] = Case(*casos, default=F(campo), output_field=output_field)
+    return valores
+
+
+# ✅ Actualización masiva de stock y precio con SQL por conjuntos
+def actualizar_inventario(cambios, vendedor):
+    """Aplica todos los cambios en una transacción o ninguno."""
+    ids = [cambio['id'] for cambio in cambios]
+    with transaction.atomic():
+        propios = Producto.objects.select_for_update().filter(vendedor=vendedor, id__in=ids)
+        encontrados = set(propios.values_list('id', flat=True))
+        ajenos = sorted(set(ids) - encontrados)
+        if ajenos:
+            raise ValidationError({'cambios': f'Productos inexistentes o ajenos: {ajenos}.'})
+        aplicar_cambios_inventario(cambios)
+    return len(ids)
+
+
+def aplicar_cambios_inventario(cambios):
+    """
+    Aplica cambios {id, stock | delta, precio} sin comprobar el dueño y
+    propaga el cambio al registro del catálogo, los eventos y la caché.
+    Debe llamarse dentro de una transacción.
+    """
+    ids = [cambio['id'] for cambio in cambios]
+    excedidos = _stock_excedido(cambios)
+    if excedidos:
+        raise ValidationError({'cambios': f'El stock superaría {STOCK_MAXIMO} en: {excedidos}.'})
+    ahora = timezone.now()
+    for lote in _en_lotes(cambios, TAMANO_LOTE):
+        valores = _valores_actualizacion(lote)
+        if valores:
+            Producto.objects.filter(id__in=[c['id'] for c in lote]).update(
+                actualizado=ahora, **valores
+            )
+
+    negativos = sorted(
+        Producto.objects.filter(id__in=ids, stock__lt=0).values_list('id', flat=True)
+    )
+    if negativos:
+        # Lanzar dentro del atomic revierte todo el lote
+        raise ValidationError({'cambios': f'El stock quedaría negativo en: {negativos}.'})
+    CambioCatalogo.registrar('producto', ids)
+    eventos.notificar_stock(Producto.objects.filter(id__in=ids).values_list('id', 'stock'))
+    transaction.on_commit(lambda: precios.invalidar_por_productos(ids))
+
+
+def _stock_excedido(cambios):
+    # Los delta positivos podrían desbordar la columna al sumarse al stock actual
+    excedidos = []
+    for lote in _en_lotes((c for c in cambios if c.get('delta', 0) > 0), TAMANO_LOTE):
+        condicion = reduce(or_, (Q(id=c['id'], stock__gt=STOCK_MAXIMO - c['delta']) for c in lote))
+        excedidos += Producto.objects.filter(condicion).values_list('id', flat=True)
+    return sorted(excedidos)
+
+
+def _valores_actualizacion(lote):
+    stock = [
+        When(id=c['id'], then=Value(c['stock']) if 'stock' in c else F('stock') + c['delta'])
+        for c in lote if 'stock' in c or 'delta' in c
+    ]
+    precio = [When(id=c['id'], then=Value(c['precio'])) for c in lote if 'precio' in c]
+
+    valores = {}
+    if stock:
+        valores['stock'] = Case(*stock, default=F('stock'), output_field=IntegerField())
+    if precio:
+        valores['precio'] = Case(
+            *precio, default=F('precio'),
+            output_field=DecimalField(max_digits=10, decimal_places=2),
+        )
+    return valores
+
+
+# ✅ Exportación en streaming
+class _Eco:
+    """Objeto tipo archivo que devuelve lo escrito, para csv.writer en streaming."""
+
+    def write(self, valor):
+        return valor
+
+
+def _filas_csv(cabecera, filas):
+    escritor = csv.writer(_Eco())
+    yield escritor.writerow(cabecera)
+    for fila in filas:
+        yield escritor.writerow(fila)
+
+
+def _filas_ndjson(cabecera, filas):
+    for fila in filas:
+        yield json.dumps(dict(zip(cabecera, fila)), default=str, ensure_ascii=False) + '\n'
+
+
+def exportar(cabecera, filas, formato):
+    if formato == 'ndjson':
+        return _filas_ndjson(cabecera, filas), 'application/x-ndjson'
+    return _filas_csv(cabecera, filas), 'text/csv; charset=utf-8'
+
+
+def filas_productos(vendedor):
+    return (
+        Producto.objects.filter(vendedor=vendedor)
+        .order_by('id')
+        .values_list('id', 'nombre', 'precio', 'categoria_id', 'stock', 'imagen')
+        .iterator(chunk_size=2000)
+    )
+
+
+def filas_ventas(vendedor):
+    """Líneas vendidas, primero las de pedidos archivados (los más antiguos)."""
+    columnas = (
+        'pedido_id', 'pedido__estado', 'pedido__usuario__username',
+        'producto_id', 'producto__nombre', 'cantidad', 'precio_unitario',
+    )
+    return chain.from_iterable(
+        modelo.objects.filter(producto__vendedor=vendedor)
+        .order_by('pedido_id', 'id')
+        .values_list(*columnas)
+        .iterator(chunk_size=2000)
+        for modelo in (DetallePedidoArchivado, DetallePedido)
+    )
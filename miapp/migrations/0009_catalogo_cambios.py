@@ -0,0 +1,49 @@
+# Generated by Django 5.2.18 on 2026-10-19 10:55
+
+from django.db import migrations, models
+
+
+def registrar_catalogo_existente(apps, schema_editor):
+    # El catálogo previo entra en el registro para que desde=0 lo devuelva completo
+    CambioCatalogo = apps.get_model('miapp', 'CambioCatalogo')
+    for modelo in ('categoria', 'producto'):
+        Modelo = apps.get_model('miapp', modelo)
+        ids = Modelo.objects.order_by('id').values_list('id', flat=True)
+        CambioCatalogo.objects.bulk_create(
+            (CambioCatalogo(modelo=modelo, objeto_id=objeto_id) for objeto_id in ids.iterator()),
+            batch_size=1000,
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('miapp', '0008_alter_pedido_estado'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='categoria',
+            name='actualizado',
+            field=models.DateTimeField(auto_now=True, db_index=True),
+        ),
+        migrations.AddField(
+            model_name='producto',
+            name='actualizado',
+            field=models.DateTimeField(auto_now=True, db_index=True),
+        ),
+        migrations.CreateModel(
+            name='CambioCatalogo',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('modelo', models.CharField(choices=[('categoria', 'Categoría'), ('producto', 'Producto')], max_length=20)),
+                ('objeto_id', models.BigIntegerField()),
+                ('eliminado', models.BooleanField(default=False)),
+                ('fecha', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['modelo', 'id'], name='cambio_modelo_id_idx')],
+            },
+        ),
+        migrations.RunPython(registrar_catalogo_existente, migrations.RunPython.noop),
+    ]
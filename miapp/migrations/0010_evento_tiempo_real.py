@@ -0,0 +1,23 @@
+# Generated by Django 5.2.18 on 2026-10-19 10:56
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('miapp', '0009_catalogo_cambios'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='EventoTiempoReal',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('canal', models.CharField(max_length=100)),
+                ('tipo', models.CharField(max_length=20)),
+                ('datos', models.JSONField()),
+                ('fecha', models.DateTimeField(auto_now_add=True, db_index=True)),
+            ],
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 5.2.18 on 2026-10-19 10:58
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('miapp', '0010_evento_tiempo_real'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='pedido',
+            index=models.Index(fields=['estado', 'usuario'], name='pedido_estado_usuario_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='pedido',
+            index=models.Index(condition=models.Q(('estado__in', ['pendiente', 'en camino'])), fields=['estado', 'id'], name='pedido_en_curso_idx'),
+        ),
+    ]
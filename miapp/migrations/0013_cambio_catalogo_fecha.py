@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-19 11:10
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('miapp', '0012_pedido_archivo'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='cambiocatalogo',
+            name='fecha',
+            field=models.DateTimeField(auto_now_add=True, db_index=True),
+        ),
+    ]
@@ -1,9 +1,12 @@
-from django.db import models
+from django.db import models, transaction
+from django.db.models import Q
 from django.contrib.auth.models import User
 from django.core.validators import MinValueValidator
+from django.utils import timezone
 
 class Categoria(models.Model):
     nombre = models.CharField(max_length=100, verbose_name="Nombre de la categoría")
+    actualizado = models.DateTimeField(auto_now=True, db_index=True)
 
     def __str__(self):
         return self.nombre
@@ -22,6 +25,7 @@ class Producto(models.Model):
     categoria = models.ForeignKey(Categoria, on_delete=models.CASCADE, related_name="productos")
     stock = models.IntegerField(validators=[MinValueValidator(0)])
     vendedor = models.ForeignKey(User, on_delete=models.CASCADE)
+    actualizado = models.DateTimeField(auto_now=True, db_index=True)
 
     def __str__(self):
         return self.nombre
@@ -42,12 +46,40 @@ class Carrito(models.Model):
     class Meta:
         unique_together = ('usuario', 'producto')
 
+class PedidoQuerySet(models.QuerySet):
+    def transicionar(self, estado):
+        """
+        Pasa a `estado` los pedidos que lo permiten según Pedido.TRANSICIONES con
+        un solo UPDATE; el resto no se modifica. Devuelve cuántos cambiaron.
+        """
+        from . import eventos
+
+        origenes = [origen for origen, destinos in Pedido.TRANSICIONES.items() if estado in destinos]
+        ahora = timezone.now()
+        with transaction.atomic():
+            cambiados = self.filter(estado__in=origenes).update(estado=estado, actualizado=ahora)
+            if cambiados and eventos.hay_interesados_pedidos():
+                # Los pedidos recién cambiados se reconocen por su marca de tiempo
+                afectados = Pedido.objects.filter(estado=estado, actualizado=ahora).values_list(
+                    'id', 'usuario_id'
+                )
+                eventos.notificar_estado(
+                    (pedido_id, usuario_id, estado)
+                    for pedido_id, usuario_id in afectados.iterator(chunk_size=eventos.TAMANO_LOTE)
+                )
+        return cambiados
+
 class Pedido(models.Model):
     ESTADOS_PEDIDO = [
         ('pendiente', 'Pendiente'),
         ('en camino', 'En camino'),
         ('entregados', 'Entregados'),
     ]
+    TRANSICIONES = {
+        'pendiente': ['en camino'],
+        'en camino': ['entregados'],
+        'entregados': [],
+    }
 
     usuario = models.ForeignKey(User, on_delete=models.CASCADE)
     total = models.DecimalField(
@@ -56,10 +88,30 @@ class Pedido(models.Model):
         validators=[MinValueValidator(0.01)]
     )
     estado = models.CharField(max_length=20, choices=ESTADOS_PEDIDO)
+    creado = models.DateTimeField(default=timezone.now, db_index=True)
+    actualizado = models.DateTimeField(auto_now=True)
+
+    objects = PedidoQuerySet.as_manager()
 
     def __str__(self):
         return f"Pedido #{self.id} - {self.usuario.username}"
 
+    def puede_pasar_a(self, estado):
+        return estado == self.estado or estado in self.TRANSICIONES.get(self.estado, [])
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['estado', 'usuario'], name='pedido_estado_usuario_idx'),
+            # Cola de preparación: solo los pedidos aún no entregados
+            models.Index(
+                fields=['estado', 'id'],
+                condition=Q(estado__in=['pendiente', 'en camino']),
+                name='pedido_en_curso_idx',
+            ),
+            # Selección de pedidos a archivar
+            models.Index(fields=['estado', 'actualizado'], name='pedido_estado_act_idx'),
+        ]
+
 class DetallePedido(models.Model):
     pedido = models.ForeignKey(Pedido, on_delete=models.CASCADE)
     producto = models.ForeignKey(Producto, on_delete=models.CASCADE)
@@ -73,6 +125,35 @@ class DetallePedido(models.Model):
     def __str__(self):
         return f"{self.pedido} - {self.producto.nombre}"
 
+# ✅ Histórico de pedidos entregados (ver el comando archivar_pedidos)
+class PedidoArchivado(models.Model):
+    id = models.BigIntegerField(primary_key=True)
+    usuario = models.ForeignKey(User, on_delete=models.CASCADE)
+    total = models.DecimalField(max_digits=10, decimal_places=2)
+    estado = models.CharField(max_length=20, choices=Pedido.ESTADOS_PEDIDO)
+    creado = models.DateTimeField()
+    actualizado = models.DateTimeField()
+    archivado = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f"Pedido archivado #{self.id} - {self.usuario.username}"
+
+    class Meta:
+        verbose_name_plural = "Pedidos archivados"
+        indexes = [
+            models.Index(fields=['usuario', 'creado'], name='pedido_arch_usuario_idx'),
+        ]
+
+class DetallePedidoArchivado(models.Model):
+    id = models.BigIntegerField(primary_key=True)
+    pedido = models.ForeignKey(PedidoArchivado, on_delete=models.CASCADE, related_name='detalles')
+    producto = models.ForeignKey(Producto, on_delete=models.CASCADE)
+    cantidad = models.IntegerField()
+    precio_unitario = models.DecimalField(max_digits=10, decimal_places=2)
+
+    def __str__(self):
+        return f"{self.pedido} - {self.producto.nombre}"
+
 class Favorito(models.Model):
     usuario = models.ForeignKey(User, on_delete=models.CASCADE)
     producto = models.ForeignKey(Producto, on_delete=models.CASCADE)
@@ -82,3 +163,40 @@ class Favorito(models.Model):
 
     class Meta:
         unique_together = ('usuario', 'producto')
+
+class CambioCatalogo(models.Model):
+    """Registro de cambios del catálogo; el id sirve de cursor para la sincronización."""
+    MODELOS = [
+        ('categoria', 'Categoría'),
+        ('producto', 'Producto'),
+    ]
+
+    modelo = models.CharField(max_length=20, choices=MODELOS)
+    objeto_id = models.BigIntegerField()
+    eliminado = models.BooleanField(default=False)
+    fecha = models.DateTimeField(auto_now_add=True, db_index=True)
+
+    def __str__(self):
+        accion = "eliminado" if self.eliminado else "modificado"
+        return f"#{self.id} {self.modelo} {self.objeto_id} {accion}"
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['modelo', 'id'], name='cambio_modelo_id_idx'),
+        ]
+
+    @classmethod
+    def registrar(cls, modelo, ids, eliminado=False):
+        cls.objects.bulk_create([
+            cls(modelo=modelo, objeto_id=objeto_id, eliminado=eliminado) for objeto_id in ids
+        ])
+
+class EventoTiempoReal(models.Model):
+    """Eventos para el backend 'base_datos' del stream SSE."""
+    canal = models.CharField(max_length=100)
+    tipo = models.CharField(max_length=20)
+    datos = models.JSONField()
+    fecha = models.DateTimeField(auto_now_add=True, db_index=True)
+
+    def __str__(self):
+        return f"{self.canal} {self.tipo}"
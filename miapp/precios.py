@@ -0,0 +1,98 @@
+from decimal import Decimal
+
+from django.core.cache import caches
+from django.core.cache.backends.dummy import DummyCache
+from django.core.cache.backends.locmem import LocMemCache
+from django.db.models import BooleanField, Case, DecimalField, ExpressionWrapper, F, When
+
+from .models import Carrito
+
+# Segundos de vida del resumen en caché
+DURACION_RESUMEN = 60
+
+
+def _cache():
+    """
+    La caché del resumen, o None si es local del proceso: la invalidación no
+    llegaría a los demás workers y mostrarían totales desactualizados.
+    """
+    cache = caches['default']
+    return None if isinstance(cache, (LocMemCache, DummyCache)) else cache
+
+
+def _clave(usuario_id):
+    return f'carrito:resumen:{usuario_id}'
+
+
+# ✅ Resumen de precios del carrito calculado por la base de datos
+def calcular_resumen(usuario):
+    """Líneas con subtotal y aviso de stock, total y unidades en una sola consulta."""
+    lineas = list(
+        Carrito.objects.filter(usuario=usuario)
+        .annotate(
+            subtotal=ExpressionWrapper(
+                F('cantidad') * F('producto__precio'),
+                output_field=DecimalField(max_digits=12, decimal_places=2),
+            ),
+            sin_stock=Case(
+                When(cantidad__gt=F('producto__stock'), then=True),
+                default=False,
+                output_field=BooleanField(),
+            ),
+        )
+        .order_by('id')
+        .values(
+            'id', 'producto_id', 'producto__nombre', 'producto__precio',
+            'producto__stock', 'cantidad', 'subtotal', 'sin_stock',
+        )
+    )
+    return {
+        'lineas': [
+            {
+                'id': linea['id'],
+                'producto': linea['producto_id'],
+                'nombre': linea['producto__nombre'],
+                'precio': linea['producto__precio'],
+                'stock': linea['producto__stock'],
+                'cantidad': linea['cantidad'],
+                'subtotal': linea['subtotal'],
+                'sin_stock': linea['sin_stock'],
+            }
+            for linea in lineas
+        ],
+        'total': sum((linea['subtotal'] for linea in lineas), Decimal('0.00')),
+        'unidades': sum(linea['cantidad'] for linea in lineas),
+        'advertencias': [
+            f"No hay suficiente stock para {linea['producto__nombre']}."
+            for linea in lineas if linea['sin_stock']
+        ],
+    }
+
+
+def resumen_carrito(usuario):
+    """Resumen en caché por usuario; se invalida al cambiar el carrito o los productos."""
+    cache = _cache()
+    if cache is None:
+        return calcular_resumen(usuario)
+    return cache.get_or_set(
+        _clave(usuario.pk), lambda: calcular_resumen(usuario), DURACION_RESUMEN
+    )
+
+
+# ✅ Invalidación
+def invalidar_usuario(usuario_id):
+    cache = _cache()
+    if cache is not None:
+        cache.delete(_clave(usuario_id))
+
+
+def invalidar_por_productos(producto_ids):
+    cache = _cache()
+    if cache is None:
+        return
+    usuarios = (
+        Carrito.objects.filter(producto_id__in=producto_ids)
+        .values_list('usuario_id', flat=True)
+        .distinct()
+    )
+    cache.delete_many([_clave(usuario_id) for usuario_id in usuarios])
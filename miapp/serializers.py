@@ -1,31 +1,87 @@
+from collections import Counter
+from decimal import Decimal
+
 from rest_framework import serializers
-from .models import Categoria, Producto, Carrito, Pedido, DetallePedido, Favorito
+from .models import (
+    Categoria, Producto, Carrito, Pedido, DetallePedido, Favorito,
+    PedidoArchivado, DetallePedidoArchivado
+)
 from django.contrib.auth.models import User
 
+# Máximo de la columna integer del stock
+STOCK_MAXIMO = 2147483647
+
+# ✅ ?fields= y ?expand= en las respuestas
+def campos_de_consulta(request, parametro):
+    """Nombres separados por comas de un parámetro, o None si no se envió."""
+    valor = request.query_params.get(parametro) if request is not None else None
+    if not valor:
+        return None
+    return {campo.strip() for campo in valor.split(',') if campo.strip()}
+
+
+class CamposDinamicosMixin:
+    # Campo -> serializer con el que se anida al pedir ?expand=campo
+    expandibles = {}
+
+    def _opcion(self, parametro):
+        # Solo el serializer raíz de la respuesta atiende la query string
+        cache = self.__dict__.setdefault('_opciones', {})
+        if parametro not in cache:
+            padre = self.parent
+            if isinstance(padre, serializers.ListSerializer):
+                padre = padre.parent
+            es_raiz = padre is None and not self.context.get('anidado')
+            if es_raiz:
+                cache[parametro] = campos_de_consulta(self.context.get('request'), parametro)
+            else:
+                # Un serializer anidado solo recibe las opciones que le pase su padre
+                cache[parametro] = self.context.get('opciones', {}).get(parametro)
+        return cache[parametro]
+
+    @property
+    def _readable_fields(self):
+        campos = self._opcion('fields')
+        for field in super()._readable_fields:
+            if campos is None or field.field_name in campos:
+                yield field
+
+    def to_representation(self, instance):
+        data = super().to_representation(instance)
+        for nombre in self._opcion('expand') or ():
+            if nombre in self.expandibles and nombre in data:
+                relacionado = getattr(instance, nombre)
+                data[nombre] = relacionado and self.expandibles[nombre](
+                    relacionado, context={**self.context, 'anidado': True, 'opciones': {}}
+                ).data
+        return data
+
 # ✅ Usuario con nombre y apellido
-class UserSerializer(serializers.ModelSerializer):
+class UserSerializer(CamposDinamicosMixin, serializers.ModelSerializer):
     class Meta:
         model = User
         fields = ['id', 'username', 'email', 'first_name', 'last_name']
 
 # ✅ Categorías
-class CategoriaSerializer(serializers.ModelSerializer):
+class CategoriaSerializer(CamposDinamicosMixin, serializers.ModelSerializer):
     class Meta:
         model = Categoria
-        fields = ['id', 'nombre']
+        fields = ['id', 'nombre', 'actualizado']
 
 # ✅ Productos
-class ProductoSerializer(serializers.ModelSerializer):
+class ProductoSerializer(CamposDinamicosMixin, serializers.ModelSerializer):
     vendedor = UserSerializer(read_only=True)
+    expandibles = {'categoria': CategoriaSerializer}
 
     class Meta:
         model = Producto
-        fields = ['id', 'nombre', 'precio', 'imagen', 'categoria', 'stock', 'vendedor']
+        fields = ['id', 'nombre', 'precio', 'imagen', 'categoria', 'stock', 'vendedor', 'actualizado']
 
 # ✅ Carrito
-class CarritoSerializer(serializers.ModelSerializer):
+class CarritoSerializer(CamposDinamicosMixin, serializers.ModelSerializer):
     usuario = UserSerializer(read_only=True)
     producto = serializers.PrimaryKeyRelatedField(queryset=Producto.objects.all())
+    expandibles = {'producto': ProductoSerializer}
 
     class Meta:
         model = Carrito
@@ -52,32 +108,168 @@ class CarritoSerializer(serializers.ModelSerializer):
 
         return super().update(instance, validated_data)
 
-# ✅ Detalle de pedidos
-class DetallePedidoProductoSerializer(serializers.ModelSerializer):
-    producto = ProductoSerializer(read_only=True)
+# ✅ Resumen de precios del carrito
+class LineaResumenCarritoSerializer(serializers.Serializer):
+    id = serializers.IntegerField()
+    producto = serializers.IntegerField()
+    nombre = serializers.CharField()
+    precio = serializers.DecimalField(max_digits=10, decimal_places=2)
+    stock = serializers.IntegerField()
+    cantidad = serializers.IntegerField()
+    subtotal = serializers.DecimalField(max_digits=12, decimal_places=2)
+    sin_stock = serializers.BooleanField()
+
+class ResumenCarritoSerializer(serializers.Serializer):
+    lineas = LineaResumenCarritoSerializer(many=True)
+    total = serializers.DecimalField(max_digits=12, decimal_places=2)
+    unidades = serializers.IntegerField()
+    advertencias = serializers.ListField(child=serializers.CharField())
+
+# ✅ Detalle de pedidos (el producto completo solo con ?expand=producto)
+class DetallePedidoProductoSerializer(CamposDinamicosMixin, serializers.ModelSerializer):
+    producto = serializers.PrimaryKeyRelatedField(read_only=True)
+    expandibles = {'producto': ProductoSerializer}
 
     class Meta:
         model = DetallePedido
         fields = ['id', 'producto', 'cantidad', 'precio_unitario']
 
 # ✅ Pedidos con detalles anidados
-class PedidoSerializer(serializers.ModelSerializer):
+class PedidoSerializer(CamposDinamicosMixin, serializers.ModelSerializer):
     usuario = UserSerializer(read_only=True)
     detalles = serializers.SerializerMethodField()
 
     class Meta:
         model = Pedido
-        fields = ['id', 'usuario', 'total', 'estado', 'detalles']
+        fields = ['id', 'usuario', 'total', 'estado', 'creado', 'detalles']
+        read_only_fields = ['creado']
+
+    def get_fields(self):
+        fields = super().get_fields()
+        # Solo el personal cambia el estado; el cliente lo ve pero no lo edita
+        request = self.context.get('request')
+        if request is None or not request.user.is_staff:
+            fields['estado'].read_only = True
+        return fields
+
+    def validate_estado(self, estado):
+        if self.instance is not None and not self.instance.puede_pasar_a(estado):
+            raise serializers.ValidationError(
+                f'Un pedido {self.instance.estado} no puede pasar a {estado}.'
+            )
+        return estado
+
+    def get_detalles(self, obj):
+        # Usa el prefetch de la vista cuando se pidieron los detalles
+        return serializar_detalles(self, obj.detallepedido_set.all(), DetallePedidoProductoSerializer)
+
+
+def serializar_detalles(padre, detalles, serializer_class):
+    """Líneas de un pedido; ?expand=detalles.producto expande su producto."""
+    expandidos = {
+        campo.split('.', 1)[1] for campo in padre._opcion('expand') or ()
+        if campo.startswith('detalles.')
+    }
+    contexto = {'anidado': True, 'opciones': {'expand': expandidos}}
+    return serializer_class(detalles, many=True, context=contexto).data
+
+# ✅ Pedidos archivados (mismo formato que los pedidos, solo lectura)
+class DetallePedidoArchivadoSerializer(CamposDinamicosMixin, serializers.ModelSerializer):
+    producto = serializers.PrimaryKeyRelatedField(read_only=True)
+    expandibles = {'producto': ProductoSerializer}
+
+    class Meta:
+        model = DetallePedidoArchivado
+        fields = ['id', 'producto', 'cantidad', 'precio_unitario']
+
+class PedidoArchivadoSerializer(CamposDinamicosMixin, serializers.ModelSerializer):
+    usuario = UserSerializer(read_only=True)
+    detalles = serializers.SerializerMethodField()
+
+    class Meta:
+        model = PedidoArchivado
+        fields = ['id', 'usuario', 'total', 'estado', 'creado', 'detalles', 'archivado']
 
     def get_detalles(self, obj):
-        detalles = DetallePedido.objects.filter(pedido=obj)
-        return DetallePedidoProductoSerializer(detalles, many=True).data
+        return serializar_detalles(self, obj.detalles.all(), DetallePedidoArchivadoSerializer)
 
 # ✅ Favoritos
-class FavoritoSerializer(serializers.ModelSerializer):
+class FavoritoSerializer(CamposDinamicosMixin, serializers.ModelSerializer):
     usuario = UserSerializer(read_only=True)
     producto = serializers.PrimaryKeyRelatedField(queryset=Producto.objects.all())
+    expandibles = {'producto': ProductoSerializer}
 
     class Meta:
         model = Favorito
         fields = ['id', 'usuario', 'producto']
+
+# ✅ Fila de importación masiva de productos
+class FilaImportacionProductoSerializer(serializers.Serializer):
+    id = serializers.IntegerField(required=False, min_value=1)
+    nombre = serializers.CharField(max_length=255, required=False)
+    precio = serializers.DecimalField(
+        max_digits=10, decimal_places=2, min_value=Decimal('0.01'), required=False
+    )
+    categoria = serializers.IntegerField(required=False, min_value=1)
+    stock = serializers.IntegerField(required=False, min_value=0, max_value=STOCK_MAXIMO)
+    imagen = serializers.CharField(max_length=100, required=False)
+
+    def validate(self, data):
+        # Sin id la fila crea un producto y necesita todos los campos
+        if 'id' not in data:
+            faltantes = [c for c in ('nombre', 'precio', 'categoria', 'stock', 'imagen') if c not in data]
+            if faltantes:
+                raise serializers.ValidationError({
+                    campo: 'Este campo es obligatorio para productos nuevos.' for campo in faltantes
+                })
+        return data
+
+# ✅ Cambio de stock / precio en actualización masiva
+class CambioInventarioSerializer(serializers.Serializer):
+    id = serializers.IntegerField(min_value=1)
+    stock = serializers.IntegerField(required=False, min_value=0, max_value=STOCK_MAXIMO)
+    delta = serializers.IntegerField(required=False, min_value=-STOCK_MAXIMO, max_value=STOCK_MAXIMO)
+    precio = serializers.DecimalField(
+        max_digits=10, decimal_places=2, min_value=Decimal('0.01'), required=False
+    )
+
+    def validate(self, data):
+        if 'stock' in data and 'delta' in data:
+            raise serializers.ValidationError('Usa stock o delta, no ambos.')
+        if not any(campo in data for campo in ('stock', 'delta', 'precio')):
+            raise serializers.ValidationError('Indica stock, delta o precio.')
+        return data
+
+
+class ActualizacionInventarioSerializer(serializers.Serializer):
+    cambios = CambioInventarioSerializer(many=True, allow_empty=False)
+
+    def validate_cambios(self, cambios):
+        conteo = Counter(cambio['id'] for cambio in cambios)
+        repetidos = sorted(i for i, veces in conteo.items() if veces > 1)
+        if repetidos:
+            raise serializers.ValidationError(f'Productos repetidos: {repetidos}.')
+        return cambios
+
+# ✅ Lote de subpeticiones
+class SubpeticionSerializer(serializers.Serializer):
+    metodo = serializers.ChoiceField(choices=['GET', 'POST', 'PUT', 'PATCH', 'DELETE'])
+    ruta = serializers.CharField(max_length=2000)
+    cuerpo = serializers.JSONField(required=False)
+
+
+class LoteSerializer(serializers.Serializer):
+    solicitudes = SubpeticionSerializer(many=True, allow_empty=False, max_length=20)
+
+# ✅ Transición masiva de estado de pedidos
+class TransicionPedidosSerializer(serializers.Serializer):
+    estado = serializers.ChoiceField(choices=Pedido.ESTADOS_PEDIDO)
+    ids = serializers.ListField(
+        child=serializers.IntegerField(min_value=1), required=False, allow_empty=False, max_length=10000
+    )
+    todos = serializers.BooleanField(default=False)
+
+    def validate(self, data):
+        if not data['todos'] and 'ids' not in data:
+            raise serializers.ValidationError('Indica ids o todos=true.')
+        return data
@@ -0,0 +1,44 @@
+from django.db import transaction
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+
+from . import eventos, precios
+from .models import Categoria, Producto, Carrito, Pedido, CambioCatalogo
+
+
+# ✅ Registro de cambios del catálogo para la sincronización incremental
+# Las escrituras masivas (bulk_create, bulk_update, update) no emiten
+# señales y llaman a CambioCatalogo.registrar directamente.
+@receiver(post_save, sender=Categoria)
+@receiver(post_save, sender=Producto)
+def registrar_cambio(sender, instance, **kwargs):
+    CambioCatalogo.registrar(sender._meta.model_name, [instance.pk])
+
+
+@receiver(post_delete, sender=Categoria)
+@receiver(post_delete, sender=Producto)
+def registrar_eliminacion(sender, instance, **kwargs):
+    CambioCatalogo.registrar(sender._meta.model_name, [instance.pk], eliminado=True)
+
+
+# ✅ Eventos en tiempo real para el stream SSE
+@receiver(post_save, sender=Producto)
+def notificar_stock(sender, instance, **kwargs):
+    eventos.notificar_stock([(instance.pk, instance.stock)])
+
+
+@receiver(post_save, sender=Pedido)
+def notificar_estado(sender, instance, **kwargs):
+    eventos.notificar_estado([(instance.pk, instance.usuario_id, instance.estado)])
+
+
+# ✅ Invalidación del resumen de carrito en caché
+@receiver(post_save, sender=Carrito)
+@receiver(post_delete, sender=Carrito)
+def invalidar_resumen_carrito(sender, instance, **kwargs):
+    transaction.on_commit(lambda: precios.invalidar_usuario(instance.usuario_id))
+
+
+@receiver(post_save, sender=Producto)
+def invalidar_resumenes_producto(sender, instance, **kwargs):
+    transaction.on_commit(lambda: precios.invalidar_por_productos([instance.pk]))
@@ -1,3 +1,213 @@
+import io
+from datetime import timedelta
+
+from django.contrib.auth.models import User
 from django.test import TestCase
+from django.utils import timezone
+from rest_framework.exceptions import ValidationError
+
+from . import catalogo, masivo
+from .models import CambioCatalogo, Categoria, Pedido, Producto
+
+
+def _archivo(contenido, nombre='productos.csv'):
+    archivo = io.BytesIO(contenido.encode())
+    archivo.name = nombre
+    return archivo
+
+
+class TransicionPedidosTests(TestCase):
+    def setUp(self):
+        self.usuario = User.objects.create_user('cliente')
+
+    def _pedido(self, estado):
+        return Pedido.objects.create(usuario=self.usuario, total=1, estado=estado)
+
+    def test_solo_cambian_los_pedidos_que_admiten_la_transicion(self):
+        pendientes = [self._pedido('pendiente') for _ in range(3)]
+        en_camino = self._pedido('en camino')
+        entregado = self._pedido('entregados')
+
+        actualizados = Pedido.objects.all().transicionar('en camino')
+
+        self.assertEqual(actualizados, 3)
+        for pedido in pendientes:
+            pedido.refresh_from_db()
+            self.assertEqual(pedido.estado, 'en camino')
+        entregado.refresh_from_db()
+        self.assertEqual(entregado.estado, 'entregados')
+        en_camino.refresh_from_db()
+        self.assertEqual(en_camino.estado, 'en camino')
+
+    def test_respeta_el_filtro_del_queryset(self):
+        elegido = self._pedido('en camino')
+        otro = self._pedido('en camino')
+
+        actualizados = Pedido.objects.filter(id=elegido.id).transicionar('entregados')
+
+        self.assertEqual(actualizados, 1)
+        otro.refresh_from_db()
+        self.assertEqual(otro.estado, 'en camino')
+
+    def test_sin_candidatos_no_cambia_nada(self):
+        self._pedido('entregados')
+        self.assertEqual(Pedido.objects.all().transicionar('en camino'), 0)
+
+
+class ImportacionProductosTests(TestCase):
+    def setUp(self):
+        self.vendedor = User.objects.create_user('vendedor')
+        self.otro = User.objects.create_user('otro')
+        self.categoria = Categoria.objects.create(nombre='Ropa')
+        self.propio = Producto.objects.create(
+            nombre='Camisa', precio=10, categoria=self.categoria, stock=5,
+            imagen='a.png', vendedor=self.vendedor,
+        )
+        self.ajeno = Producto.objects.create(
+            nombre='Pantalón', precio=20, categoria=self.categoria, stock=5,
+            imagen='b.png', vendedor=self.otro,
+        )
+
+    def test_crea_y_actualiza_solo_productos_propios(self):
+        contenido = (
+            'id,nombre,precio,categoria,stock,imagen\n'
+            f',Gorra,7.50,{self.categoria.id},3,c.png\n'
+            f'{self.propio.id},,12.00,,,\n'
+            f'{self.ajeno.id},,1.00,,,\n'
+        )
+        resultado = masivo.importar_productos(_archivo(contenido), self.vendedor)
+
+        self.assertEqual(resultado.creados, 1)
+        self.assertEqual(resultado.actualizados, 1)
+        self.assertEqual([error['fila'] for error in resultado.errores], [3])
+        self.assertTrue(Producto.objects.filter(nombre='Gorra', vendedor=self.vendedor).exists())
+        self.propio.refresh_from_db()
+        self.ajeno.refresh_from_db()
+        self.assertEqual(str(self.propio.precio), '12.00')
+        self.assertEqual(str(self.ajeno.precio), '20.00')
+
+    def test_no_escribe_columnas_que_la_fila_no_trae(self):
+        # Simula un checkout que cambió el stock después de cargar el producto
+        Producto.objects.filter(id=self.propio.id).update(stock=2)
+        contenido = f'id,precio\n{self.propio.id},11.00\n'
+
+        masivo.importar_productos(_archivo(contenido), self.vendedor)
+
+        self.propio.refresh_from_db()
+        self.assertEqual(self.propio.stock, 2)
+        self.assertEqual(str(self.propio.precio), '11.00')
+
+    def test_error_de_lectura_conserva_los_lotes_guardados(self):
+        # El byte inválido queda después del primer lote completo
+        filas = masivo.TAMANO_LOTE * 2
+        contenido = 'nombre,precio,categoria,stock,imagen\n' + ''.join(
+            f'P{i},1,{self.categoria.id},1,x.png\n' for i in range(filas)
+        )
+        archivo = io.BytesIO(contenido.encode() + b'\xff\n')
+        archivo.name = 'productos.csv'
+
+        resultado = masivo.importar_productos(archivo, self.vendedor)
+
+        self.assertEqual(resultado.creados, masivo.TAMANO_LOTE)
+        self.assertEqual(resultado.filas_procesadas, masivo.TAMANO_LOTE)
+        self.assertIsNotNone(resultado.error)
+        self.assertEqual(
+            Producto.objects.filter(vendedor=self.vendedor).count(), masivo.TAMANO_LOTE + 1
+        )
+
+
+class ActualizacionInventarioTests(TestCase):
+    def setUp(self):
+        self.vendedor = User.objects.create_user('vendedor')
+        self.otro = User.objects.create_user('otro')
+        categoria = Categoria.objects.create(nombre='Ropa')
+        self.productos = [
+            Producto.objects.create(
+                nombre=f'P{i}', precio=10, categoria=categoria, stock=5,
+                imagen='a.png', vendedor=self.vendedor,
+            )
+            for i in range(2)
+        ]
+        self.ajeno = Producto.objects.create(
+            nombre='Ajeno', precio=10, categoria=categoria, stock=5,
+            imagen='a.png', vendedor=self.otro,
+        )
+
+    def _stock(self):
+        return list(Producto.objects.order_by('id').values_list('stock', flat=True))
+
+    def test_aplica_stock_delta_y_precio(self):
+        primero, segundo = self.productos
+        actualizados = masivo.actualizar_inventario(
+            [{'id': primero.id, 'stock': 9}, {'id': segundo.id, 'delta': -2, 'precio': 4}],
+            self.vendedor,
+        )
+
+        self.assertEqual(actualizados, 2)
+        self.assertEqual(self._stock(), [9, 3, 5])
+        segundo.refresh_from_db()
+        self.assertEqual(str(segundo.precio), '4.00')
+
+    def test_rechaza_productos_ajenos(self):
+        with self.assertRaises(ValidationError):
+            masivo.actualizar_inventario(
+                [{'id': self.productos[0].id, 'stock': 1}, {'id': self.ajeno.id, 'stock': 1}],
+                self.vendedor,
+            )
+        self.assertEqual(self._stock(), [5, 5, 5])
+
+    def test_stock_negativo_revierte_todo_el_lote(self):
+        primero, segundo = self.productos
+        with self.assertRaises(ValidationError):
+            masivo.actualizar_inventario(
+                [{'id': primero.id, 'delta': -1}, {'id': segundo.id, 'delta': -6}],
+                self.vendedor,
+            )
+        self.assertEqual(self._stock(), [5, 5, 5])
+
+
+class CambiosCatalogoTests(TestCase):
+    def setUp(self):
+        vendedor = User.objects.create_user('vendedor')
+        self.categoria = Categoria.objects.create(nombre='Ropa')
+        self.producto = Producto.objects.create(
+            nombre='Camisa', precio=10, categoria=self.categoria, stock=5,
+            imagen='a.png', vendedor=vendedor,
+        )
+
+    def _envejecer(self, **filtro):
+        CambioCatalogo.objects.filter(**filtro).update(fecha=timezone.now() - timedelta(minutes=1))
+
+    def test_devuelve_el_ultimo_cambio_de_cada_objeto(self):
+        self.producto.stock = 4
+        self.producto.save()
+        producto_id = self.producto.id
+        self.producto.delete()
+        self._envejecer()
+
+        modificados, eliminados, cursor, mas = catalogo.cambios_desde(0, 100)
+
+        self.assertEqual(modificados, {'categoria': [self.categoria.id], 'producto': []})
+        self.assertEqual(eliminados, {'categoria': [], 'producto': [producto_id]})
+        self.assertEqual(cursor, CambioCatalogo.objects.latest('id').id)
+        self.assertFalse(mas)
+
+    def test_pagina_con_el_limite(self):
+        self._envejecer()
+
+        _, _, cursor, mas = catalogo.cambios_desde(0, 1)
+        self.assertTrue(mas)
+        modificados, _, _, mas = catalogo.cambios_desde(cursor, 1)
+        self.assertEqual(modificados['producto'], [self.producto.id])
+        self.assertFalse(mas)
+
+    def test_el_cursor_no_pasa_de_los_cambios_recientes(self):
+        # Solo el primer registro es antiguo; el siguiente podría tener por
+        # delante una transacción con un id menor aún sin confirmar
+        primero = CambioCatalogo.objects.order_by('id').first()
+        self._envejecer(id=primero.id)
+
+        modificados, _, cursor, _ = catalogo.cambios_desde(0, 100)
 
-# Create your tests here.
+        self.assertEqual(cursor, primero.id)
+        self.assertEqual(modificados, {'categoria': [self.categoria.id], 'producto': []})
@@ -3,7 +3,7 @@ from rest_framework.routers import DefaultRouter
 from .views import (
     CategoriaViewSet, ProductoViewSet, CarritoViewSet, PedidoViewSet,
     DetallePedidoViewSet, FavoritoViewSet, UserViewSet, UsuarioActualView,
-    CheckoutView  
+    CheckoutView, CambiosCatalogoView, EventosView, LoteView
 )
 
 # 🔀 Enrutador de vistas REST
@@ -21,4 +21,7 @@ urlpatterns = [
     path('', include(router.urls)),
     path('usuario-actual/', UsuarioActualView.as_view(), name='usuario_actual'),
     path('checkout/', CheckoutView.as_view(), name='checkout'),  # ✅ Nueva ruta
+    path('catalogo/cambios/', CambiosCatalogoView.as_view(), name='catalogo_cambios'),
+    path('eventos/', EventosView.as_view(), name='eventos'),
+    path('batch/', LoteView.as_view(), name='batch'),
 ]
@@ -1,17 +1,109 @@
 from rest_framework import viewsets, permissions, status
+from rest_framework.decorators import action
+from rest_framework.generics import get_object_or_404
 from rest_framework.response import Response
 from rest_framework.views import APIView
+import asyncio
+import json
+from itertools import islice
+
+from asgiref.sync import sync_to_async
 from django.contrib.auth.models import User
-from .models import Categoria, Producto, Carrito, Pedido, DetallePedido, Favorito
+from django.db import transaction
+from django.http import Http404, JsonResponse, StreamingHttpResponse
+from django.views import View
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import InvalidToken, TokenError
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date
+from .models import Categoria, Producto, Carrito, Pedido, DetallePedido, Favorito, PedidoArchivado
 from .serializers import (
     CategoriaSerializer, ProductoSerializer, CarritoSerializer,
     PedidoSerializer, DetallePedidoProductoSerializer,
-    FavoritoSerializer, UserSerializer
+    FavoritoSerializer, UserSerializer, ActualizacionInventarioSerializer,
+    LoteSerializer, TransicionPedidosSerializer, PedidoArchivadoSerializer,
+    ResumenCarritoSerializer, campos_de_consulta
 )
-from rest_framework.exceptions import ValidationError
+from rest_framework.exceptions import AuthenticationFailed, ValidationError
+from . import catalogo, eventos, lotes, masivo, precios
+from .admision import CubetaTokensThrottle
+
+# ✅ Joins y prefetch solo para los campos que se van a serializar
+class ConsultaDinamicaMixin:
+    # Campo -> relaciones que necesita cuando aparece en la respuesta
+    select_por_campo = {}
+    prefetch_por_campo = {}
+    # Campo -> relaciones que necesita cuando además se pide ?expand=
+    # (admite campos anidados como 'detalles.producto')
+    select_por_expansion = {}
+    prefetch_por_expansion = {}
+
+    def optimizar_queryset(self, queryset, select_por_campo=None, prefetch_por_campo=None,
+                           prefetch_por_expansion=None):
+        select_por_campo = self.select_por_campo if select_por_campo is None else select_por_campo
+        prefetch_por_campo = self.prefetch_por_campo if prefetch_por_campo is None else prefetch_por_campo
+        if prefetch_por_expansion is None:
+            prefetch_por_expansion = self.prefetch_por_expansion
+        campos = campos_de_consulta(self.request, 'fields')
+        expandidos = campos_de_consulta(self.request, 'expand') or set()
+
+        def incluido(campo):
+            return campos is None or campo.split('.', 1)[0] in campos
+
+        select = [r for c, rels in select_por_campo.items() if incluido(c) for r in rels]
+        select += [
+            r for c, rels in self.select_por_expansion.items()
+            if c in expandidos and incluido(c) for r in rels
+        ]
+        prefetch = [r for c, rels in prefetch_por_campo.items() if incluido(c) for r in rels]
+        prefetch += [
+            r for c, rels in prefetch_por_expansion.items()
+            if c in expandidos and incluido(c) for r in rels
+        ]
+        if select:
+            queryset = queryset.select_related(*select)
+        if prefetch:
+            queryset = queryset.prefetch_related(*prefetch)
+        return queryset
+
+# ✅ Multi-get: ?ids=1,2,3 en los listados
+class MultiGetMixin:
+    max_ids = 100
+
+    def filter_queryset(self, queryset):
+        queryset = super().filter_queryset(queryset)
+        valor = self.request.query_params.get('ids')
+        if self.action != 'list' or not valor:
+            return queryset
+        try:
+            ids = {int(i) for i in valor.split(',') if i.strip()}
+        except ValueError:
+            raise ValidationError({'ids': 'Debe ser una lista de números separados por comas.'})
+        if len(ids) > self.max_ids:
+            raise ValidationError({'ids': f'Máximo {self.max_ids} ids por consulta.'})
+        return queryset.filter(pk__in=ids)
+
+# ✅ Respuestas condicionales (ETag / Last-Modified) en los listados del catálogo
+class CatalogoCondicionalMixin:
+    modelos_catalogo = ()
+
+    def list(self, request, *args, **kwargs):
+        etag, modificado = catalogo.version_catalogo(self.modelos_catalogo, request)
+        ultima_modificacion = int(modificado.timestamp()) if modificado else None
+        no_modificado = get_conditional_response(
+            request, etag=etag, last_modified=ultima_modificacion
+        )
+        if no_modificado is not None:
+            return no_modificado
+
+        response = super().list(request, *args, **kwargs)
+        response['ETag'] = etag
+        if ultima_modificacion is not None:
+            response['Last-Modified'] = http_date(ultima_modificacion)
+        return response
 
 # ✅ Usuarios
-class UserViewSet(viewsets.ReadOnlyModelViewSet):
+class UserViewSet(MultiGetMixin, viewsets.ReadOnlyModelViewSet):
     queryset = User.objects.all()
     serializer_class = UserSerializer
     permission_classes = [permissions.IsAuthenticated]
@@ -25,32 +117,141 @@ class UsuarioActualView(APIView):
         return Response(serializer.data)
 
 # ✅ Categorías
-class CategoriaViewSet(viewsets.ModelViewSet):
+class CategoriaViewSet(CatalogoCondicionalMixin, MultiGetMixin, viewsets.ModelViewSet):
     queryset = Categoria.objects.all()
     serializer_class = CategoriaSerializer
     permission_classes = [permissions.AllowAny]
+    modelos_catalogo = ('categoria',)
 
 # ✅ Productos
-class ProductoViewSet(viewsets.ModelViewSet):
+class ProductoViewSet(CatalogoCondicionalMixin, MultiGetMixin, ConsultaDinamicaMixin, viewsets.ModelViewSet):
     serializer_class = ProductoSerializer
     permission_classes = [permissions.IsAuthenticatedOrReadOnly]
+    modelos_catalogo = ('producto', 'categoria')
+    select_por_campo = {'vendedor': ['vendedor']}
+    select_por_expansion = {'categoria': ['categoria']}
 
     def get_queryset(self):
         usuario = self.request.user
         if usuario.is_authenticated:
-            return Producto.objects.exclude(vendedor=usuario)
-        return Producto.objects.all()
+            queryset = Producto.objects.exclude(vendedor=usuario)
+        else:
+            queryset = Producto.objects.all()
+        return self.optimizar_queryset(queryset)
 
     def perform_create(self, serializer):
         serializer.save(vendedor=self.request.user)
 
+    # 📥 Importación masiva CSV / NDJSON de los productos del vendedor
+    @action(detail=False, methods=['post'], permission_classes=[permissions.IsAuthenticated])
+    def importar(self, request):
+        archivo = request.FILES.get('archivo')
+        if archivo is None:
+            raise ValidationError({'archivo': 'Debes enviar un archivo CSV o NDJSON.'})
+        resultado = masivo.importar_productos(
+            archivo, request.user, formato=request.query_params.get('formato')
+        )
+        # Con error de lectura se informa igualmente lo que ya quedó guardado
+        codigo = status.HTTP_400_BAD_REQUEST if resultado.error else status.HTTP_200_OK
+        return Response(resultado.como_dict(), status=codigo)
+
+    # 📦 Actualización masiva de stock / precio de los productos del vendedor
+    @action(detail=False, methods=['post'], url_path='actualizar-inventario',
+            permission_classes=[permissions.IsAuthenticated])
+    def actualizar_inventario(self, request):
+        serializer = ActualizacionInventarioSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        actualizados = masivo.actualizar_inventario(
+            serializer.validated_data['cambios'], request.user
+        )
+        return Response({'actualizados': actualizados})
+
+    # 📤 Exportación en streaming de los productos del vendedor
+    @action(detail=False, methods=['get'], permission_classes=[permissions.IsAuthenticated])
+    def exportar(self, request):
+        return _respuesta_exportacion(
+            request, masivo.CAMPOS_PRODUCTO, masivo.filas_productos(request.user),
+            request.query_params.get('formato', 'csv'), 'productos',
+        )
+
+    # 📤 Exportación en streaming de las líneas vendidas por el vendedor
+    @action(detail=False, methods=['get'], url_path='exportar-ventas',
+            permission_classes=[permissions.IsAuthenticated])
+    def exportar_ventas(self, request):
+        return _respuesta_exportacion(
+            request, masivo.CAMPOS_VENTAS, masivo.filas_ventas(request.user),
+            request.query_params.get('formato', 'csv'), 'ventas',
+        )
+
+
+def _respuesta_exportacion(request, cabecera, filas, formato, nombre):
+    if formato not in ('csv', 'ndjson'):
+        raise ValidationError({'formato': 'Usa csv o ndjson.'})
+    contenido, content_type = masivo.exportar(cabecera, filas, formato)
+    if 'wsgi.version' not in request.META:
+        # Bajo ASGI Django cargaría en memoria un iterador síncrono completo
+        contenido = _iterar_async(contenido)
+    respuesta = StreamingHttpResponse(contenido, content_type=content_type)
+    respuesta['Content-Disposition'] = f'attachment; filename="{nombre}.{formato}"'
+    return respuesta
+
+async def _iterar_async(iterador, tamano=500):
+    # Mismo hilo en cada bloque: el cursor del servidor vive en su conexión
+    siguiente = sync_to_async(lambda: ''.join(islice(iterador, tamano)), thread_sensitive=True)
+    while bloque := await siguiente():
+        yield bloque
+
+# ✅ Cambios del catálogo desde un cursor (sincronización incremental)
+class CambiosCatalogoView(APIView):
+    permission_classes = [permissions.AllowAny]
+    limite_maximo = 1000
+
+    def get(self, request):
+        try:
+            cursor = int(request.query_params.get('desde', 0))
+            limite = int(request.query_params.get('limite', self.limite_maximo))
+        except ValueError:
+            raise ValidationError({'desde': 'El cursor y el límite deben ser números enteros.'})
+        limite = max(1, min(limite, self.limite_maximo))
+
+        modificados, eliminados, nuevo_cursor, mas = catalogo.cambios_desde(cursor, limite)
+        categorias = Categoria.objects.filter(id__in=modificados['categoria'])
+        productos = Producto.objects.filter(id__in=modificados['producto']).select_related('vendedor')
+        contexto = {'request': request}
+        categorias_data = CategoriaSerializer(categorias, many=True, context=contexto).data
+        productos_data = ProductoSerializer(productos, many=True, context=contexto).data
+
+        # Lo que se modificó y ya no existe se informa como eliminado
+        eliminados['categoria'] += sorted(set(modificados['categoria']) - {c['id'] for c in categorias_data})
+        eliminados['producto'] += sorted(set(modificados['producto']) - {p['id'] for p in productos_data})
+
+        return Response({
+            'cursor': nuevo_cursor,
+            'mas': mas,
+            'categorias': categorias_data,
+            'productos': productos_data,
+            'eliminados': {
+                'categorias': eliminados['categoria'],
+                'productos': eliminados['producto'],
+            },
+        })
+
 # ✅ Carrito con validación de duplicados
-class CarritoViewSet(viewsets.ModelViewSet):
+class CarritoViewSet(MultiGetMixin, ConsultaDinamicaMixin, viewsets.ModelViewSet):
     serializer_class = CarritoSerializer
     permission_classes = [permissions.IsAuthenticated]
+    throttle_classes = [CubetaTokensThrottle]
+    throttle_scope = 'carrito'
+    select_por_campo = {'usuario': ['usuario']}
+    select_por_expansion = {'producto': ['producto__vendedor']}
 
     def get_queryset(self):
-        return Carrito.objects.filter(usuario=self.request.user)
+        return self.optimizar_queryset(Carrito.objects.filter(usuario=self.request.user))
+
+    # 🧾 Subtotales, total y avisos de stock calculados por la base de datos
+    @action(detail=False, methods=['get'])
+    def resumen(self, request):
+        return Response(ResumenCarritoSerializer(precios.resumen_carrito(request.user)).data)
 
     def perform_create(self, serializer):
         usuario = self.request.user
@@ -76,65 +277,195 @@ class CarritoViewSet(viewsets.ModelViewSet):
             serializer.save(usuario=usuario)
 
 # ✅ Pedidos
-class PedidoViewSet(viewsets.ModelViewSet):
+class PedidoViewSet(MultiGetMixin, ConsultaDinamicaMixin, viewsets.ModelViewSet):
     serializer_class = PedidoSerializer
     permission_classes = [permissions.IsAuthenticated]
+    select_por_campo = {'usuario': ['usuario']}
+    prefetch_por_campo = {'detalles': ['detallepedido_set']}
+    prefetch_por_expansion = {'detalles.producto': ['detallepedido_set__producto__vendedor']}
 
     def get_queryset(self):
-        return Pedido.objects.filter(usuario=self.request.user)
+        return self.optimizar_queryset(Pedido.objects.filter(usuario=self.request.user))
+
+    # 🗄️ Histórico: ?archivados=1 añade los pedidos archivados al listado y el
+    # detalle de un pedido archivado se sirve aunque ya no esté en la tabla principal
+    def get_queryset_archivados(self):
+        return self.optimizar_queryset(
+            PedidoArchivado.objects.filter(usuario=self.request.user),
+            prefetch_por_campo={'detalles': ['detalles']},
+            prefetch_por_expansion={'detalles.producto': ['detalles__producto__vendedor']},
+        )
+
+    def list(self, request, *args, **kwargs):
+        if request.query_params.get('archivados') not in ('1', 'true'):
+            return super().list(request, *args, **kwargs)
+        pedidos = self.get_serializer(self.filter_queryset(self.get_queryset()), many=True).data
+        archivados = PedidoArchivadoSerializer(
+            self.filter_queryset(self.get_queryset_archivados()),
+            many=True, context=self.get_serializer_context(),
+        ).data
+        return Response(pedidos + archivados)
+
+    def retrieve(self, request, *args, **kwargs):
+        try:
+            return super().retrieve(request, *args, **kwargs)
+        except Http404:
+            archivado = get_object_or_404(self.get_queryset_archivados(), pk=kwargs['pk'])
+            return Response(PedidoArchivadoSerializer(archivado, context=self.get_serializer_context()).data)
+
+    # 🚚 Transición masiva de estado (personal de operaciones)
+    @action(detail=False, methods=['post'], permission_classes=[permissions.IsAdminUser])
+    def transicion(self, request):
+        serializer = TransicionPedidosSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        datos = serializer.validated_data
+        pedidos = Pedido.objects.all()
+        if not datos['todos']:
+            pedidos = pedidos.filter(id__in=datos['ids'])
+        actualizados = pedidos.transicionar(datos['estado'])
+        return Response({'estado': datos['estado'], 'actualizados': actualizados})
 
 # ✅ Detalles del Pedido
-class DetallePedidoViewSet(viewsets.ModelViewSet):
+class DetallePedidoViewSet(MultiGetMixin, ConsultaDinamicaMixin, viewsets.ModelViewSet):
     serializer_class = DetallePedidoProductoSerializer
     permission_classes = [permissions.IsAuthenticated]
+    select_por_expansion = {'producto': ['producto__vendedor']}
 
     def get_queryset(self):
-        return DetallePedido.objects.filter(pedido__usuario=self.request.user)
+        return self.optimizar_queryset(DetallePedido.objects.filter(pedido__usuario=self.request.user))
 
 # ✅ Favoritos
-class FavoritoViewSet(viewsets.ModelViewSet):
+class FavoritoViewSet(MultiGetMixin, ConsultaDinamicaMixin, viewsets.ModelViewSet):
     serializer_class = FavoritoSerializer
     permission_classes = [permissions.IsAuthenticated]
+    select_por_campo = {'usuario': ['usuario']}
+    select_por_expansion = {'producto': ['producto__vendedor']}
 
     def get_queryset(self):
-        return Favorito.objects.filter(usuario=self.request.user)
+        return self.optimizar_queryset(Favorito.objects.filter(usuario=self.request.user))
 
     def perform_create(self, serializer):
         serializer.save(usuario=self.request.user)
 
+# ✅ Lote de subpeticiones con una sola autenticación
+class LoteView(APIView):
+    permission_classes = [permissions.AllowAny]
+
+    def post(self, request):
+        serializer = LoteSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        respuestas = []
+        for solicitud in serializer.validated_data['solicitudes']:
+            codigo, cuerpo = lotes.ejecutar(
+                request, solicitud['metodo'], solicitud['ruta'], solicitud.get('cuerpo')
+            )
+            respuestas.append({'status': codigo, 'cuerpo': cuerpo})
+        return Response({'respuestas': respuestas})
+
 # ✅ Checkout con validación de stock
 class CheckoutView(APIView):
     permission_classes = [permissions.IsAuthenticated]
+    throttle_classes = [CubetaTokensThrottle]
+    throttle_scope = 'checkout'
 
     def post(self, request):
         usuario = request.user
-        carrito_items = Carrito.objects.filter(usuario=usuario)
 
-        if not carrito_items.exists():
-            return Response({'error': 'El carrito está vacío'}, status=status.HTTP_400_BAD_REQUEST)
+        with transaction.atomic():
+            # Bloquea los productos del carrito (en orden de id) hasta terminar la compra
+            list(
+                Producto.objects.select_for_update()
+                .filter(id__in=Carrito.objects.filter(usuario=usuario).values('producto_id'))
+                .order_by('id')
+                .values_list('id', flat=True)
+            )
+            resumen = precios.calcular_resumen(usuario)
+
+            if not resumen['lineas']:
+                return Response({'error': 'El carrito está vacío'}, status=status.HTTP_400_BAD_REQUEST)
 
-        # Validar stock
-        for item in carrito_items:
-            if item.cantidad > item.producto.stock:
-                return Response({
-                    'error': f'No hay suficiente stock para {item.producto.nombre}.'
-                }, status=status.HTTP_400_BAD_REQUEST)
+            # Validar stock
+            if resumen['advertencias']:
+                return Response({'error': resumen['advertencias'][0]}, status=status.HTTP_400_BAD_REQUEST)
 
-        total = sum(item.producto.precio * item.cantidad for item in carrito_items)
+            pedido = Pedido.objects.create(usuario=usuario, total=resumen['total'], estado='pendiente')
+            DetallePedido.objects.bulk_create([
+                DetallePedido(
+                    pedido=pedido,
+                    producto_id=linea['producto'],
+                    cantidad=linea['cantidad'],
+                    precio_unitario=linea['precio']
+                )
+                for linea in resumen['lineas']
+            ])
+            masivo.aplicar_cambios_inventario([
+                {'id': linea['producto'], 'delta': -linea['cantidad']} for linea in resumen['lineas']
+            ])
+            Carrito.objects.filter(usuario=usuario).delete()
 
-        pedido = Pedido.objects.create(usuario=usuario, total=total, estado='pendiente')
+        return Response({'mensaje': 'Compra realizada con éxito'}, status=status.HTTP_201_CREATED)
+
+# ✅ Stream SSE de stock y estado de pedidos (requiere ASGI)
+class EventosView(View):
+    """
+    GET /api/eventos/?productos=1,2 envía el stock de esos productos cuando cambia.
+    Con un JWT (cabecera Authorization o ?token=) también envía los cambios de
+    estado de los pedidos del usuario. Solo se sirve con el servidor ASGI.
+    """
+    intervalo_ping = 15
 
-        for item in carrito_items:
-            DetallePedido.objects.create(
-                pedido=pedido,
-                producto=item.producto,
-                cantidad=item.cantidad,
-                precio_unitario=item.producto.precio
+    async def get(self, request):
+        # Bajo WSGI el flujo ocuparía un worker para siempre
+        if 'wsgi.version' in request.META:
+            return JsonResponse(
+                {'error': 'Los eventos solo están disponibles con el servidor ASGI.'}, status=501
             )
-            producto = item.producto
-            producto.stock -= item.cantidad
-            producto.save()
+        try:
+            productos = {
+                int(i) for i in request.GET.get('productos', '').split(',') if i.strip()
+            }
+        except ValueError:
+            return JsonResponse({'error': 'productos debe ser una lista de ids.'}, status=400)
 
-        carrito_items.delete()
+        canales = [eventos.canal_producto(i) for i in sorted(productos)]
+        if request.headers.get('Authorization') or request.GET.get('token'):
+            usuario = await sync_to_async(self._autenticar)(request)
+            if usuario is None:
+                return JsonResponse({'error': 'Token inválido.'}, status=401)
+            canales.append(eventos.canal_pedidos(usuario.pk))
+        if not canales:
+            return JsonResponse({'error': 'Indica productos o envía un token.'}, status=400)
 
-        return Response({'mensaje': 'Compra realizada con éxito'}, status=status.HTTP_201_CREATED)
+        eventos.backend().iniciar()
+        respuesta = StreamingHttpResponse(self._flujo(canales), content_type='text/event-stream')
+        respuesta['Cache-Control'] = 'no-cache'
+        respuesta['X-Accel-Buffering'] = 'no'
+        return respuesta
+
+    def _autenticar(self, request):
+        autenticacion = JWTAuthentication()
+        token = request.GET.get('token')
+        if token is None:
+            cabecera = autenticacion.get_header(request)
+            token = autenticacion.get_raw_token(cabecera) if cabecera else None
+        if token is None:
+            return None
+        try:
+            return autenticacion.get_user(autenticacion.get_validated_token(token))
+        except (InvalidToken, TokenError, AuthenticationFailed):
+            return None
+
+    async def _flujo(self, canales):
+        entrada = eventos.difusor.suscribir(canales)
+        cola = entrada[1]
+        try:
+            yield 'retry: 3000\n\n'
+            while True:
+                try:
+                    evento = await asyncio.wait_for(cola.get(), timeout=self.intervalo_ping)
+                except asyncio.TimeoutError:
+                    yield ': ping\n\n'
+                    continue
+                yield f"event: {evento['tipo']}\ndata: {json.dumps(evento['datos'])}\n\n"
+        finally:
+            eventos.difusor.cancelar(canales, entrada)